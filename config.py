@@ -12,16 +12,29 @@ class Settings(BaseSettings):
     POSTGRES_PASSWORD: str = Field(..., env="POSTGRES_PASSWORD")
     POSTGRES_DB: str = Field(..., env="POSTGRES_DB")
     DATABASE_DSN: PostgresDsn | str = Field(..., env="DATABASE_DSN")
+    # Размер пула соединений (DB_POOL_MAX по умолчанию -
+    # MONITOR_CONCURRENCY + 5, но не меньше 10)
+    DB_POOL_MIN: int = Field(5, env="DB_POOL_MIN", ge=1)
+    DB_POOL_MAX: int | None = Field(None, env="DB_POOL_MAX", ge=1)
 
     # --- System settings ---
     POLL_INTERVAL_SECONDS: int = Field(600, env="POLL_INTERVAL_SECONDS")
+    # Предел, до которого растёт интервал проверки товара без изменений
+    POLL_BACKOFF_MAX_SECONDS: int = Field(1800, env="POLL_BACKOFF_MAX_SECONDS")
     DEFAULT_MAX_FREE_LINKS: int = Field(5, env="DEFAULT_MAX_FREE_LINKS")
 
     # --- Logging ---
     LOG_LEVEL: str = Field("INFO", env="LOG_LEVEL")
+    # Профилировать каждый N-й цикл мониторинга (0 - выключено)
+    PROFILE_EVERY: int = Field(0, env="PROFILE_EVERY", ge=0)
 
     # --- WB API ---
     USE_XPOW: bool = Field(True, env="USE_XPOW")
+    XPOW_STATS_LOG_EVERY: int = Field(10, env="XPOW_STATS_LOG_EVERY", ge=1)
+    # Сколько запросов к WB выполняется одновременно
+    MONITOR_CONCURRENCY: int = Field(10, env="MONITOR_CONCURRENCY", ge=1)
+    # Запускать мониторинг в отдельном процессе (handlers не ждут его CPU)
+    MONITOR_SEPARATE_PROCESS: bool = Field(False, env="MONITOR_SEPARATE_PROCESS")
 
     class Config:
         env_file = ".env"
@@ -259,8 +259,7 @@ async def show_users_menu(query: CallbackQuery, user_repo: UserRepository):
     """Меню управления пользователями."""
     try:
         total = await user_repo.count_total()
-        recent = await user_repo.get_all()  # Уже отсортировано
-        recent = recent[:10]  # Берём первые 10
+        recent = await user_repo.get_recent(10)
         
         text = (
             "👥 <b>Управление пользователями</b>\n\n"
@@ -269,9 +268,9 @@ async def show_users_menu(query: CallbackQuery, user_repo: UserRepository):
         )
         
         for i, user in enumerate(recent, 1):
-            user_id_masked = str(user['id'])[:4] + "****"
-            created = user['created_at'].strftime('%d.%m %H:%M')
-            text += f"{i}. ID: {user_id_masked} | {user['plan_name']} | {created}\n"
+            user_id_masked = str(user.id)[:4] + "****"
+            created = user.created_at.strftime('%d.%m %H:%M')
+            text += f"{i}. ID: {user_id_masked} | {user.plan_name} | {created}\n"
         
         text += "\n💡 Используйте /user <id> для управления пользователем"
         
@@ -544,7 +544,7 @@ async def cb_product_detail(
     user_id = query.from_user.id
     
     # Получаем товар через сервис
-    product_repo = container.get_product_repo()
+    product_repo = container.product_repo
     product_dict = await product_repo.get_by_nm_id(user_id, nm_id)
     
     if not product_dict:
@@ -594,7 +594,7 @@ async def cb_show_graph(
     nm_id = int(query.data.split(":", 1)[1])
     user_id = query.from_user.id
     
-    product_repo = container.get_product_repo()
+    product_repo = container.product_repo
     product = await product_repo.get_by_nm_id(user_id, nm_id)
     
     if not product:
@@ -666,7 +666,7 @@ async def cb_rename_start(
     nm_id = int(query.data.split(":", 1)[1])
     user_id = query.from_user.id
     
-    product_repo = container.get_product_repo()
+    product_repo = container.product_repo
     product = await product_repo.get_by_nm_id(user_id, nm_id)
     
     if not product:
@@ -734,7 +734,7 @@ async def cb_notify_settings(
     nm_id = int(query.data.split(":", 1)[1])
     user_id = query.from_user.id
 
-    product_repo = container.get_product_repo()
+    product_repo = container.product_repo
     product = await product_repo.get_by_nm_id(user_id, nm_id)
     
     if not product:
@@ -772,7 +772,7 @@ async def cb_notify_percent(query: CallbackQuery, state: FSMContext, container:
     nm_id = int(query.data.split(":", 1)[1])
     user_id = query.from_user.id
 
-    product_repo = container.get_product_repo()
+    product_repo = container.product_repo
     product = await product_repo.get_by_nm_id(user_id, nm_id)
     
     if not product:
@@ -800,7 +800,7 @@ async def cb_notify_threshold(query: CallbackQuery, state: FSMContext, container
     nm_id = int(query.data.split(":", 1)[1])
     user_id = query.from_user.id
 
-    product_repo = container.get_product_repo()
+    product_repo = container.product_repo
     product = await product_repo.get_by_nm_id(user_id, nm_id)
     
     if not product:
@@ -831,7 +831,7 @@ async def cb_notify_all(query: CallbackQuery, product_service: ProductService, c
     nm_id = int(query.data.split(":", 1)[1])
     user_id = query.from_user.id
 
-    product_repo = container.get_product_repo()
+    product_repo = container.product_repo
     product = await product_repo.get_by_nm_id(user_id, nm_id)
     
     if not product:
@@ -947,7 +947,7 @@ async def cb_confirm_remove(query: CallbackQuery, container: Container):
     nm_id = int(query.data.split(":", 1)[1])
     user_id = query.from_user.id
 
-    product_repo = container.get_product_repo()
+    product_repo = container.product_repo
     product = await product_repo.get_by_nm_id(user_id, nm_id)
     
     if not product:
@@ -993,7 +993,7 @@ async def cb_back_to_product(query: CallbackQuery, container: Container):
     nm_id = int(query.data.split(":", 1)[1])
     user_id = query.from_user.id
 
-    product_repo = container.get_product_repo()
+    product_repo = container.product_repo
     product = await product_repo.get_by_nm_id(user_id, nm_id)
 
     if not product:
@@ -7,7 +7,7 @@ from aiogram.filters import Command
 
 from services.user_service import UserService
 from services.product_service import ProductService
-from keyboards.kb import create_smart_menu, start_kb
+from keyboards.kb import KEYBOARDS, create_smart_menu
 
 router = Router()
 
@@ -39,7 +39,7 @@ async def cmd_start(
             "🎁 <b>Попробуйте БЕСПЛАТНО:</b>\n"
             "Добавьте первый товар прямо сейчас 👇",
             parse_mode="HTML",
-            reply_markup=start_kb()
+            reply_markup=KEYBOARDS["start"]
         )
         return
     
@@ -1,10 +1,19 @@
 from datetime import datetime
-from typing import Optional
+from typing import NamedTuple, Optional
 from pydantic import BaseModel
 
 
-class ProductRow(BaseModel):
-    """Модель продукта."""
+_tuple_new = tuple.__new__
+
+
+class ProductRow(NamedTuple):
+    """
+    Модель продукта.
+
+    NamedTuple, а не dataclass: строка мониторинга собирается из
+    asyncpg.Record одним вызовом tuple.__new__ на C-уровне, без
+    Python-кода __init__ на каждое поле.
+    """
     id: int
     user_id: int
     url_product: str
@@ -20,6 +29,21 @@ class ProductRow(BaseModel):
     out_of_stock: Optional[bool] = None
     created_at: Optional[datetime] = None
     updated_at: Optional[datetime] = None
+    # Текущий интервал проверки (product_checks), None - ещё не проверялся
+    check_interval: Optional[int] = None
+
+    # Колонки в порядке полей - для позиционной сборки из asyncpg.Record
+    COLUMNS = (
+        "id, user_id, url_product, nm_id, name_product, custom_name, "
+        "selected_size, notify_mode, notify_value, last_basic_price, "
+        "last_product_price, last_qty, out_of_stock, created_at, updated_at, "
+        "check_interval"
+    )
+
+    @classmethod
+    def from_record(cls, record) -> "ProductRow":
+        """Собрать из записи, выбранной в порядке COLUMNS."""
+        return _tuple_new(cls, record)
 
     @property
     def display_name(self) -> str:
@@ -2,7 +2,7 @@
 Репозиторий истории цен - работа с БД через DTO.
 ТОЛЬКО SQL, никакой бизнес-логики про планы!
 """
-from typing import List, Optional
+from typing import Dict, List, Optional
 from datetime import datetime
 from infrastructure.db import DB
 from core.dto import PriceHistoryDTO
@@ -14,6 +14,9 @@ from utils.decorators import retry_on_error
 
 _repo_cache = SimpleCache(ttl_seconds=120)
 
+# Сколько записей истории удалять за один запрос при очистке
+DELETE_BATCH_SIZE = 10000
+
 
 class PriceHistoryRepository:
     """
@@ -53,7 +56,7 @@ class PriceHistoryRepository:
         if not row:
             return None
 
-        dto = PriceHistoryDTO(**dict(row))
+        dto = PriceHistoryDTO(**row)
         return self.mapper.to_entity(dto)
 
     async def delete(self, record_id: int) -> bool:
@@ -83,7 +86,7 @@ class PriceHistoryRepository:
         )
 
         return [
-            self.mapper.to_entity(PriceHistoryDTO(**dict(r)))
+            self.mapper.to_entity(PriceHistoryDTO(**r))
             for r in rows
         ]
 
@@ -117,7 +120,7 @@ class PriceHistoryRepository:
         rows = await self.db.fetch(query, product_ids, limit)
 
         return [
-            self.mapper.to_entity(PriceHistoryDTO(**dict(r)))
+            self.mapper.to_entity(PriceHistoryDTO(**r))
             for r in rows
         ]
 
@@ -125,15 +128,30 @@ class PriceHistoryRepository:
 
     @cached(cache_instance=_repo_cache)
     async def count_total(self) -> int:
-        """Общее количество записей."""
+        """
+        Примерное количество записей (для статистики).
+
+        Оценка из pg_class.reltuples не сканирует таблицу. Пока таблица
+        ни разу не анализировалась (reltuples = -1), считаем точно.
+        """
+        estimate = await self.db.fetchval(
+            "SELECT reltuples::BIGINT FROM pg_class "
+            "WHERE oid = 'price_history'::regclass"
+        )
+        if estimate is None or estimate < 0:
+            return await self.count_total_exact()
+        return estimate
+
+    async def count_total_exact(self) -> int:
+        """Точное количество записей (полный проход по таблице)."""
         return await self.db.fetchval("SELECT COUNT(*) FROM price_history")
 
     async def count_recent(self, days: int) -> int:
         """Количество записей за последние N дней."""
         return await self.db.fetchval(
             """SELECT COUNT(*) FROM price_history
-               WHERE recorded_at >= NOW() - $1::INTERVAL""",
-            f"{days} days"
+               WHERE recorded_at >= NOW() - $1::INT * INTERVAL '1 day'""",
+            days
         )
 
     async def count_by_product(self, product_id: int) -> int:
@@ -179,25 +197,110 @@ class PriceHistoryRepository:
         )
         return deleted_count
 
+    async def delete_older_than_by_plan(
+        self,
+        retention_days: Dict[str, int]
+    ) -> Dict[str, int]:
+        """
+        Удалить записи старше срока хранения плана владельца товара.
+
+        Все планы обрабатываются одним запросом, записи удаляются
+        порциями по DELETE_BATCH_SIZE (см. delete_all_older_than).
+
+        Args:
+            retention_days: Срок хранения в днях по ключу плана
+
+        Returns:
+            Количество удалённых записей по планам
+        """
+        result = dict.fromkeys(retention_days, 0)
+
+        while True:
+            rows = await self.db.fetch(
+                """WITH retention AS (
+                       SELECT * FROM unnest($1::text[], $2::int[])
+                           AS r(plan, days)
+                   ), doomed AS (
+                       SELECT ph.id, u.plan
+                       FROM price_history ph
+                       JOIN products p ON p.id = ph.product_id
+                       JOIN users u ON u.id = p.user_id
+                       JOIN retention r ON r.plan = u.plan
+                       WHERE ph.recorded_at
+                             < NOW() - r.days * INTERVAL '1 day'
+                       LIMIT $3
+                   ), deleted AS (
+                       DELETE FROM price_history ph
+                       USING doomed d
+                       WHERE ph.id = d.id
+                       RETURNING d.plan
+                   )
+                   SELECT plan, COUNT(*) AS deleted
+                   FROM deleted GROUP BY plan""",
+                list(retention_days.keys()),
+                list(retention_days.values()),
+                DELETE_BATCH_SIZE
+            )
+
+            batch_deleted = 0
+            for row in rows:
+                result[row['plan']] += row['deleted']
+                batch_deleted += row['deleted']
+
+            if batch_deleted < DELETE_BATCH_SIZE:
+                return result
+
     async def delete_all_older_than(self, days: int) -> int:
         """
         Удалить ВСЕ записи старше N дней (для глобальной очистки).
 
+        Удаляем порциями по DELETE_BATCH_SIZE: каждая порция - короткая
+        отдельная транзакция, без многомиллионного DELETE, который
+        держит блокировки и раздувает WAL.
+
         Args:
             days: Количество дней
 
         Returns:
             Количество удалённых записей
         """
-        result = await self.db.execute(
-            """DELETE FROM price_history
-               WHERE recorded_at < NOW() - $1::INTERVAL""",
-            f"{days} days"
-        )
+        deleted_count = 0
+
+        while True:
+            result = await self.db.execute(
+                """DELETE FROM price_history
+                   WHERE id IN (
+                       SELECT id FROM price_history
+                       WHERE recorded_at
+                             < NOW() - $1::INT * INTERVAL '1 day'
+                       LIMIT $2
+                   )""",
+                days, DELETE_BATCH_SIZE
+            )
 
-        deleted_count = (
-            int(result.split()[-1])
-            if result != "DELETE 0"
-            else 0
+            batch_deleted = int(result.split()[-1])
+            deleted_count += batch_deleted
+            if batch_deleted < DELETE_BATCH_SIZE:
+                return deleted_count
+
+    async def delete_orphaned(self) -> int:
+        """
+        Удалить записи истории несуществующих товаров.
+
+        NOT EXISTS планируется как anti-join по индексу products.id
+        (NOT IN с подзапросом - нет). Удалённые строки считаются на
+        сервере, клиенту возвращается одно число.
+
+        Returns:
+            Количество удалённых записей
+        """
+        return await self.db.fetchval(
+            """WITH deleted AS (
+                   DELETE FROM price_history ph
+                   WHERE NOT EXISTS (
+                       SELECT 1 FROM products p WHERE p.id = ph.product_id
+                   )
+                   RETURNING 1
+               )
+               SELECT COUNT(*) FROM deleted"""
         )
-        return deleted_count
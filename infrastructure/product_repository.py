@@ -1,16 +1,22 @@
 """
 Репозиторий товаров - работа с БД через DTO.
 """
-from typing import Optional, List
+from contextlib import aclosing
+from typing import AsyncIterator, Optional, List
 from infrastructure.db import DB
 from core.dto import ProductDTO
 from core.enums import NotifyMode
 from core.entities import Product
 from core.mappers import ProductMapper
-from utils.cache import cached, SimpleCache
+from infrastructure.models import ProductRow
 from utils.decorators import retry_on_error
 
-_repo_cache = SimpleCache(ttl_seconds=60)
+# Товары, которые пора проверить ($1 - запас в секундах)
+_DUE_PRODUCTS = """
+    FROM products p
+    LEFT JOIN product_checks c ON c.product_id = p.id
+    WHERE c.next_check_at IS NULL
+       OR c.next_check_at <= NOW() + $1::INT * INTERVAL '1 second'"""
 
 
 class ProductRepository:
@@ -25,7 +31,7 @@ class ProductRepository:
 
     def _row_to_entity(self, row) -> Product:
         """Конвертировать asyncpg.Record в Product."""
-        dto = ProductDTO(**dict(row))
+        dto = ProductDTO(**row)
         return self.mapper.to_entity(dto)
 
     def _rows_to_entities(self, rows) -> List[Product]:
@@ -108,13 +114,39 @@ class ProductRepository:
 
     # ===== Поиск =====
 
-    async def get_all_products(self) -> List[Product]:
-        """Получить ВСЕ товары (для мониторинга)."""
-        rows = await self.db.fetch(
-            """SELECT * FROM products
-               ORDER BY updated_at ASC NULLS FIRST"""
+    async def iter_due_product_rows(
+        self,
+        lookahead_seconds: int = 0
+    ) -> AsyncIterator[ProductRow]:
+        """
+        Потоково перебрать товары, которые пора проверить (для мониторинга).
+
+        Строки читаются серверным курсором, колонки выбираются в порядке
+        полей ProductRow - строки собираются позиционно, без dict(row).
+
+        Args:
+            lookahead_seconds: Взять и товары, срок которых наступит
+                               в ближайшие N секунд
+        """
+        # prefetch 1000 - строки маленькие, а round-trip'ов за цикл меньше
+        records = self.db.iterate(
+            f"""SELECT {ProductRow.COLUMNS} {_DUE_PRODUCTS}
+                ORDER BY c.next_check_at ASC NULLS FIRST""",
+            lookahead_seconds,
+            prefetch=1000
+        )
+        # aclosing - чтобы при досрочном выходе курсор и соединение
+        # освобождались сразу
+        async with aclosing(records):
+            async for record in records:
+                yield ProductRow.from_record(record)
+
+    async def has_due_products(self, lookahead_seconds: int = 0) -> bool:
+        """Есть ли товары, которые пора проверить."""
+        return await self.db.fetchval(
+            f"SELECT EXISTS (SELECT 1 {_DUE_PRODUCTS})",
+            lookahead_seconds
         )
-        return self._rows_to_entities(rows)
 
     async def get_by_user(self, user_id: int) -> List[Product]:
         """Получить товары пользователя."""
@@ -143,7 +175,6 @@ class ProductRepository:
 
     # ===== Статистика =====
 
-    @cached(cache_instance=_repo_cache)
     async def count_by_user(self, user_id: int) -> int:
         """Количество товаров у пользователя."""
         return await self.db.fetchval(
@@ -155,7 +186,6 @@ class ProductRepository:
         """Общее количество товаров."""
         return await self.db.fetchval("SELECT COUNT(*) FROM products")
 
-    @cached(cache_instance=_repo_cache)
     async def count_out_of_stock(self, user_id: int) -> int:
         """Количество товаров без наличия у пользователя."""
         return await self.db.fetchval(
@@ -170,6 +200,24 @@ class ProductRepository:
             "SELECT COUNT(*) FROM products WHERE out_of_stock = true"
         )
 
+    async def get_user_stats(self, user_id: int) -> tuple[int, int, int]:
+        """
+        Статистика товаров пользователя одним запросом.
+
+        Returns:
+            (всего товаров, без наличия, средняя цена)
+        """
+        row = await self.db.fetchrow(
+            """SELECT COUNT(*) AS total,
+                      COUNT(*) FILTER (WHERE out_of_stock) AS out_of_stock,
+                      AVG(last_product_price) AS avg_price
+               FROM products
+               WHERE user_id = $1""",
+            user_id
+        )
+        avg = row["avg_price"]
+        return row["total"], row["out_of_stock"], int(avg) if avg else 0
+
     async def get_cheapest(self, user_id: int) -> Optional[Product]:
         """Самый дешёвый товар пользователя."""
         row = await self.db.fetchrow(
@@ -206,7 +254,6 @@ class ProductRepository:
 
         return self._row_to_entity(row)
 
-    @cached(cache_instance=_repo_cache)
     async def get_average_price(self, user_id: int) -> int:
         """Средняя цена товаров пользователя."""
         avg = await self.db.fetchval(
@@ -271,6 +318,126 @@ class ProductRepository:
         )
         return result == "UPDATE 1"
 
+    @retry_on_error(max_attempts=3, delay=0.5)
+    async def update_prices_with_history(
+        self,
+        product_id: int,
+        basic_price: int,
+        product_price: int,
+        qty: Optional[int],
+        out_of_stock: bool,
+        changed: bool,
+        save_history: bool,
+        check_interval: int
+    ) -> bool:
+        """
+        Назначить следующую проверку, а если данные изменились (changed) -
+        обновить цены и остатки и (если save_history) записать точку
+        истории цен. Всё одним запросом.
+
+        Returns:
+            True, если строка товара обновлена
+        """
+        updated = await self.db.fetchval(
+            """WITH upd AS (
+                   UPDATE products
+                   SET last_basic_price = $1,
+                       last_product_price = $2,
+                       last_qty = $3,
+                       out_of_stock = $4,
+                       updated_at = NOW()
+                   WHERE id = $5 AND $6::BOOLEAN
+                   RETURNING id
+               ), ins AS (
+                   INSERT INTO price_history (
+                       product_id, basic_price, product_price, qty
+                   )
+                   SELECT id, $1, $2, $3 FROM upd WHERE $7::BOOLEAN
+               ), chk AS (
+                   INSERT INTO product_checks (
+                       product_id, next_check_at, check_interval
+                   )
+                   SELECT id, NOW() + $8::INT * INTERVAL '1 second', $8::INT
+                   FROM products WHERE id = $5
+                   ON CONFLICT (product_id) DO UPDATE
+                   SET next_check_at = EXCLUDED.next_check_at,
+                       check_interval = EXCLUDED.check_interval
+               )
+               SELECT COUNT(*) FROM upd""",
+            basic_price, product_price, qty, out_of_stock, product_id,
+            changed, save_history, check_interval
+        )
+        return updated == 1
+
+    @retry_on_error(max_attempts=3, delay=0.5)
+    async def bulk_update_prices(self, records: List[tuple]) -> int:
+        """
+        Массово назначить следующие проверки, обновить изменившиеся
+        цены/остатки и записать историю цен.
+
+        Записи загружаются через COPY во временную таблицу, дальше -
+        по одному запросу на таблицу на всю пачку.
+
+        Args:
+            records: Кортежи (product_id, basic_price, product_price,
+                     qty, out_of_stock, changed, save_history,
+                     check_interval)
+
+        Returns:
+            Количество обновлённых товаров
+        """
+        async with self.db.pool.acquire() as conn:
+            async with conn.transaction():
+                await conn.execute(
+                    """CREATE TEMP TABLE tmp_price_updates (
+                           id INT,
+                           basic_price INT,
+                           product_price INT,
+                           qty INT,
+                           out_of_stock BOOLEAN,
+                           changed BOOLEAN,
+                           save_history BOOLEAN,
+                           check_interval INT
+                       ) ON COMMIT DROP"""
+                )
+                await conn.copy_records_to_table(
+                    "tmp_price_updates", records=records
+                )
+                result = await conn.execute(
+                    """UPDATE products p
+                       SET last_basic_price = t.basic_price,
+                           last_product_price = t.product_price,
+                           last_qty = t.qty,
+                           out_of_stock = t.out_of_stock,
+                           updated_at = NOW()
+                       FROM tmp_price_updates t
+                       WHERE p.id = t.id AND t.changed"""
+                )
+                await conn.execute(
+                    """INSERT INTO price_history (
+                           product_id, basic_price, product_price, qty
+                       )
+                       SELECT t.id, t.basic_price, t.product_price, t.qty
+                       FROM tmp_price_updates t
+                       JOIN products p ON p.id = t.id
+                       WHERE t.save_history"""
+                )
+                await conn.execute(
+                    """INSERT INTO product_checks (
+                           product_id, next_check_at, check_interval
+                       )
+                       SELECT t.id,
+                              NOW() + t.check_interval * INTERVAL '1 second',
+                              t.check_interval
+                       FROM tmp_price_updates t
+                       JOIN products p ON p.id = t.id
+                       ON CONFLICT (product_id) DO UPDATE
+                       SET next_check_at = EXCLUDED.next_check_at,
+                           check_interval = EXCLUDED.check_interval"""
+                )
+
+        return int(result.split()[-1])
+
     async def update_notify_settings(
         self,
         product_id: int,
@@ -1,17 +1,55 @@
 """
 Репозиторий пользователей - работа с БД через DTO.
 """
-from typing import Optional, List
+from typing import Dict, Optional, List
+from asyncpg import Record
 from infrastructure.db import DB
 from core.dto import UserDTO
 from core.entities import User
 from core.mappers import UserMapper
 from core.enums import Plan, SortMode
+from constants import PLAN_DESCRIPTIONS
 from utils.cache import cached, SimpleCache
 
 
 _repo_cache = SimpleCache(ttl_seconds=300)
 
+# Настройки пользователей для мониторинга (plan, discount_percent, dest),
+# ключ - user_id. Сбрасывается при изменении пользователя через репозиторий
+_monitor_settings_cache = SimpleCache(ttl_seconds=600)
+
+# Строки пользователей для get_by_id (asyncpg.Record неизменяем, entity
+# собирается заново на каждый вызов), ключ - user_id
+_user_row_cache = SimpleCache(ttl_seconds=600)
+
+# Распределение пользователей по тарифам (GROUP BY по всей таблице).
+# Сбрасывается при смене тарифа, новые пользователи - по TTL
+_plan_stats_cache = SimpleCache(ttl_seconds=300)
+_PLAN_STATS_KEY = "plan_stats"
+
+# Кэши настроек и строк пользователей (см. disable_user_caches)
+_user_caches_enabled = True
+
+
+def disable_user_caches():
+    """
+    Выключить кэши пользователей в текущем процессе.
+
+    Для процесса мониторинга (MONITOR_SEPARATE_PROCESS): пользователей
+    меняет процесс бота, и _invalidate_user до кэшей другого процесса
+    не доходит - без кэша изменения видны со следующей пачки товаров.
+    """
+    global _user_caches_enabled
+    _user_caches_enabled = False
+    _monitor_settings_cache.clear()
+    _user_row_cache.clear()
+
+
+def _invalidate_user(user_id: int):
+    """Очистить кэши пользователя после изменения."""
+    _monitor_settings_cache.remove(user_id)
+    _user_row_cache.remove(user_id)
+
 
 class UserRepository:
     """
@@ -33,7 +71,7 @@ class UserRepository:
 
     def _row_to_entity(self, row) -> User:
         """Конвертировать asyncpg.Record в User."""
-        dto = UserDTO(**dict(row))
+        dto = UserDTO(**row)
         return self.mapper.to_entity(dto)
 
     def _rows_to_entities(self, rows) -> List[User]:
@@ -43,31 +81,52 @@ class UserRepository:
     # ===== CRUD =====
 
     async def get_by_id(self, user_id: int) -> Optional[User]:
-        """Получить пользователя по ID."""
-        row = await self.db.fetchrow(
-            self._BASE_QUERY + " WHERE id = $1",
-            user_id
-        )
-        return self._row_to_entity(row) if row else None
+        """Получить пользователя по ID (строка кэшируется)."""
+        row = _user_row_cache.get(user_id) if _user_caches_enabled else None
+        if row is None:
+            row = await self.db.fetchrow(
+                self._BASE_QUERY + " WHERE id = $1",
+                user_id
+            )
+            if row is None:
+                return None
+            if _user_caches_enabled:
+                _user_row_cache.set(user_id, row)
+        return self._row_to_entity(row)
 
     async def create(self, entity: User) -> User:
-        """Создать пользователя."""
+        """
+        Создать пользователя.
+
+        Если пользователь уже есть, возвращается существующий - тем же
+        запросом, без UPDATE строки.
+        """
         dto = self.mapper.to_dto(entity)
 
         try:
             row = await self.db.fetchrow(
-                """INSERT INTO users (id, plan, discount_percent, max_links,
-                                    dest, pvz_address, sort_mode)
-                VALUES ($1, $2, $3, $4, $5, $6, $7)
-                ON CONFLICT (id) DO NOTHING
-                RETURNING id, plan, discount_percent, max_links,
-                         dest, pvz_address, sort_mode""",
+                """WITH ins AS (
+                       INSERT INTO users (id, plan, discount_percent,
+                                          max_links, dest, pvz_address,
+                                          sort_mode)
+                       VALUES ($1, $2, $3, $4, $5, $6, $7)
+                       ON CONFLICT (id) DO NOTHING
+                       RETURNING id, plan, discount_percent, max_links,
+                                 dest, pvz_address, sort_mode, created_at
+                   )
+                   SELECT * FROM ins
+                   UNION ALL
+                   SELECT id, plan, discount_percent, max_links,
+                          dest, pvz_address, sort_mode, created_at
+                   FROM users WHERE id = $1""",
                 dto.id, dto.plan, dto.discount_percent, dto.max_links,
                 dto.dest, dto.pvz_address, dto.sort_mode,
             )
         except Exception as e:
             raise RuntimeError(f"Ошибка при создании пользователя: {e}")
 
+        # Строку, вставленную параллельным запросом, снимок может не
+        # увидеть - тогда читаем её отдельно
         return self._row_to_entity(row) if row else await self.get_by_id(
             dto.id
         )
@@ -84,18 +143,61 @@ class UserRepository:
             dto.id, dto.plan, dto.discount_percent, dto.max_links,
             dto.dest, dto.pvz_address, dto.sort_mode,
         )
+        _invalidate_user(dto.id)
+        _plan_stats_cache.remove(_PLAN_STATS_KEY)
 
         return result == "UPDATE 1"
 
     async def delete(self, user_id: int) -> bool:
         """Удалить пользователя."""
-        result = await self.db.execute(
-            "DELETE FROM users WHERE id = $1", user_id
+        deleted = await self.db.fetchval(
+            "DELETE FROM users WHERE id = $1 RETURNING 1", user_id
         )
-        return result == "DELETE 1"
+        _invalidate_user(user_id)
+        _plan_stats_cache.remove(_PLAN_STATS_KEY)
+        return deleted is not None
 
     # ===== Специфичные запросы =====
 
+    async def get_monitor_settings(
+            self, user_ids: List[int]
+    ) -> Dict[int, Record]:
+        """
+        Настройки пользователей для мониторинга.
+
+        Берутся из кэша (если он не выключен), недостающие - одним
+        запросом. Строки asyncpg
+        отдаются как есть: поддерживают row["plan"] и row.get("plan").
+
+        Returns:
+            {user_id: Record с полями id, plan, discount_percent, dest}
+        """
+        result: Dict[int, Record] = {}
+        missing: List[int] = []
+        if not _user_caches_enabled:
+            missing = list(user_ids)
+        else:
+            for user_id in user_ids:
+                user_settings = _monitor_settings_cache.get(user_id)
+                if user_settings is None:
+                    missing.append(user_id)
+                else:
+                    result[user_id] = user_settings
+
+        if missing:
+            rows = await self.db.fetch(
+                """SELECT id, plan, discount_percent, dest
+                   FROM users
+                   WHERE id = ANY($1::bigint[])""",
+                missing,
+            )
+            for row in rows:
+                if _user_caches_enabled:
+                    _monitor_settings_cache.set(row["id"], row)
+                result[row["id"]] = row
+
+        return result
+
     async def get_all(self) -> List[User]:
         """Получить всех пользователей."""
         rows = await self.db.fetch(
@@ -103,6 +205,14 @@ class UserRepository:
         )
         return self._rows_to_entities(rows)
 
+    async def get_recent(self, limit: int) -> List[User]:
+        """Последние N зарегистрированных пользователей."""
+        rows = await self.db.fetch(
+            self._BASE_QUERY + " ORDER BY created_at DESC LIMIT $1",
+            limit
+        )
+        return self._rows_to_entities(rows)
+
     async def get_by_plan(self, plan: Plan) -> List[User]:
         """Получить пользователей по тарифному плану."""
         rows = await self.db.fetch(
@@ -115,27 +225,56 @@ class UserRepository:
 
     @cached(cache_instance=_repo_cache)
     async def count_total(self) -> int:
-        """Общее количество пользователей."""
+        """
+        Примерное количество пользователей (для статистики).
+
+        Оценка из pg_class.reltuples не сканирует таблицу. Пока таблица
+        ни разу не анализировалась (reltuples = -1), считаем точно.
+        """
+        estimate = await self.db.fetchval(
+            "SELECT reltuples::BIGINT FROM pg_class "
+            "WHERE oid = 'users'::regclass"
+        )
+        if estimate is None or estimate < 0:
+            return await self.count_total_exact()
+        return estimate
+
+    async def count_total_exact(self) -> int:
+        """Точное количество пользователей (полный проход по таблице)."""
         return await self.db.fetchval("SELECT COUNT(*) FROM users")
 
     async def count_recent(self, days: int) -> int:
         """Количество пользователей добавленных за последние N дней."""
         return await self.db.fetchval(
             """SELECT COUNT(*) FROM users
-               WHERE created_at >= NOW() - $1::INTERVAL""",
-            f"{days} days",
+               WHERE created_at >= NOW() - $1::INT * INTERVAL '1 day'""",
+            days,
         )
 
-    @cached(cache_instance=_repo_cache)
-    async def get_plan_stats(self) -> List[dict]:
-        """Статистика по тарифам."""
-        rows = await self.db.fetch(
-            """SELECT plan, COUNT(*) as count
-               FROM users
-               GROUP BY plan
-               ORDER BY count DESC"""
-        )
-        return [dict(r) for r in rows]
+    async def get_plan_stats(self) -> List[Record]:
+        """Статистика по тарифам (кэшируется)."""
+        stats = _plan_stats_cache.get(_PLAN_STATS_KEY)
+        if stats is None:
+            stats = await self.db.fetch(
+                """SELECT plan, COUNT(*) as count
+                   FROM users
+                   GROUP BY plan
+                   ORDER BY count DESC"""
+            )
+            _plan_stats_cache.set(_PLAN_STATS_KEY, stats)
+        return stats
+
+    async def get_plan_stats_with_names(self) -> List[dict]:
+        """Статистика по тарифам с названиями для админки."""
+        return [
+            {
+                **plan_stats,
+                "plan_name": PLAN_DESCRIPTIONS.get(
+                    plan_stats["plan"], {}
+                ).get("name", plan_stats["plan"])
+            }
+            for plan_stats in await self.get_plan_stats()
+        ]
 
     # ===== Обновление отдельных полей =====
 
@@ -147,6 +286,8 @@ class UserRepository:
             """UPDATE users SET plan = $2, max_links = $3 WHERE id = $1""",
             user_id, plan.value, max_links
         )
+        _invalidate_user(user_id)
+        _plan_stats_cache.remove(_PLAN_STATS_KEY)
         return result == "UPDATE 1"
 
     async def update_discount(self, user_id: int, discount: int) -> bool:
@@ -155,6 +296,7 @@ class UserRepository:
             "UPDATE users SET discount_percent = $1 WHERE id = $2",
             discount, user_id
         )
+        _invalidate_user(user_id)
         return result == "UPDATE 1"
 
     async def update_pvz(
@@ -165,6 +307,7 @@ class UserRepository:
             "UPDATE users SET dest = $1, pvz_address = $2 WHERE id = $3",
             dest, address, user_id
         )
+        _invalidate_user(user_id)
         return result == "UPDATE 1"
 
     async def update_sort_mode(
@@ -175,4 +318,5 @@ class UserRepository:
             "UPDATE users SET sort_mode = $1 WHERE id = $2",
             sort_mode.value, user_id
         )
+        _invalidate_user(user_id)
         return result == "UPDATE 1"
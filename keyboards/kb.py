@@ -1,12 +1,54 @@
 """
 Клавиатуры для бота.
 Оптимизированная версия с фабриками и переиспользованием кода.
+
+Статические клавиатуры (без параметров) собираются один раз при импорте
+модуля и разделяются между всеми handlers. Чтобы один handler не мог
+испортить общую клавиатуру для остальных, такие синглтоны создаются как
+_FrozenMarkup: модель заморожена, а ряды кнопок - списки только для
+чтения (_ReadOnlyRows), поэтому ни присваивание, ни
+.inline_keyboard.append(...) невозможны. Поле остаётся списком родителя:
+методы вроде EditMessageText сериализуют клавиатуру по схеме
+InlineKeyboardMarkup, и любой другой тип там не пройдёт.
+Если нужна изменяемая копия - соберите новую клавиатуру через simple_kb().
+Фабрики с параметрами, вызываемые на каждом просмотре (product_detail_kb),
+кэшируются через lru_cache и тоже возвращают _FrozenMarkup.
 """
+from functools import lru_cache
+
 from aiogram.types import InlineKeyboardButton, InlineKeyboardMarkup
-from typing import List, Dict
+from pydantic import ConfigDict
+from typing import Callable, Final, List, Dict
 
 from keyboards.builders import PaginatedKeyboard
 
+# Статичные части ссылки на карточку WB
+_WB_URL_PRE: Final = "https://www.wildberries.ru/catalog/"
+_WB_URL_SUF: Final = "/detail.aspx"
+
+
+class _ReadOnlyRows(list):
+    """Список только для чтения (ряды и кнопки общей клавиатуры)."""
+
+    def _read_only(self, *args, **kwargs):
+        raise TypeError(
+            "Общая клавиатура неизменяема - соберите новую через simple_kb()"
+        )
+
+    append = extend = insert = remove = pop = clear = _read_only
+    sort = reverse = _read_only
+    __setitem__ = __delitem__ = __iadd__ = __imul__ = _read_only
+
+    def __reduce__(self):
+        # copy/deepcopy собирают копию через конструктор, а не append
+        return type(self), (list(self),)
+
+
+class _FrozenMarkup(InlineKeyboardMarkup):
+    """Неизменяемая клавиатура для безопасного переиспользования."""
+
+    model_config = ConfigDict(frozen=True)
+
 
 # ============= ФАБРИКИ КНОПОК =============
 
@@ -43,6 +85,18 @@ def simple_kb(*buttons_rows: List[InlineKeyboardButton]) -> InlineKeyboardMarkup
     return InlineKeyboardMarkup(inline_keyboard=list(buttons_rows))
 
 
+def _frozen_kb(*buttons_rows: List[InlineKeyboardButton]) -> _FrozenMarkup:
+    """Создать неизменяемую клавиатуру для модульного синглтона."""
+    # Кнопки проверяем обычной моделью, а собираем без валидации -
+    # иначе pydantic заменил бы _ReadOnlyRows обычными списками
+    rows = InlineKeyboardMarkup(inline_keyboard=list(buttons_rows))
+    return _FrozenMarkup.model_construct(
+        inline_keyboard=_ReadOnlyRows(
+            _ReadOnlyRows(row) for row in rows.inline_keyboard
+        )
+    )
+
+
 def single_button_kb(text: str, callback_data: str) -> InlineKeyboardMarkup:
     """Клавиатура с одной кнопкой."""
     return simple_kb([btn(text, callback_data)])
@@ -55,16 +109,19 @@ def back_kb(callback_data: str = "back_to_menu") -> InlineKeyboardMarkup:
 
 # ============= ГЛАВНОЕ МЕНЮ =============
 
+_MAIN_KB: Final[InlineKeyboardMarkup] = _frozen_kb(
+    [btn("➕ Добавить товар", "add_product")],
+    [btn("📦 Мои товары", "list_products")],
+    [btn("🗑 Удалить товар", "remove_product")],
+    [btn("📋 Экспорт в Excel/CSV", "export_menu")],
+    [btn("📊 Моя статистика", "my_stats")],
+    [btn("⚙️ Настройки", "settings")]
+)
+
+
 def main_inline_kb() -> InlineKeyboardMarkup:
     """Главное меню."""
-    return simple_kb(
-        [btn("➕ Добавить товар", "add_product")],
-        [btn("📦 Мои товары", "list_products")],
-        [btn("🗑 Удалить товар", "remove_product")],
-        [btn("📋 Экспорт в Excel/CSV", "export_menu")],
-        [btn("📊 Моя статистика", "my_stats")],
-        [btn("⚙️ Настройки", "settings")]
-    )
+    return _MAIN_KB
 
 
 def create_smart_menu(products_count: int, max_links: int, plan: str) -> InlineKeyboardMarkup:
@@ -100,57 +157,75 @@ def create_smart_menu(products_count: int, max_links: int, plan: str) -> InlineK
 
 # ============= ОНБОРДИНГ =============
 
+_START_KB: Final[InlineKeyboardMarkup] = _frozen_kb(
+    [btn("➕ Добавить товар и начать экономить", "onboarding_add_first")],
+    [btn("📋 Сначала выбрать тариф", "show_plans_first")]
+)
+
+
 def start_kb() -> InlineKeyboardMarkup:
     """Стартовая клавиатура для новых пользователей."""
-    return simple_kb(
-        [btn("➕ Добавить товар и начать экономить", "onboarding_add_first")],
-        [btn("📋 Сначала выбрать тариф", "show_plans_first")]
-    )
+    return _START_KB
+
+
+_ONBOARDING_KB: Final[InlineKeyboardMarkup] = _frozen_kb(
+    [btn("➕ Добавить ещё товар", "add_product")],
+    [btn("📋 Выбрать тариф", "show_plans_first")],
+    [btn("📦 Мои товары", "list_products")]
+)
 
 
 def onboarding_kb() -> InlineKeyboardMarkup:
     """Клавиатура после добавления первого товара."""
-    return simple_kb(
-        [btn("➕ Добавить ещё товар", "add_product")],
-        [btn("📋 Выбрать тариф", "show_plans_first")],
-        [btn("📦 Мои товары", "list_products")]
-    )
+    return _ONBOARDING_KB
+
+
+_ONBOARDING_DISCOUNT_KB: Final[InlineKeyboardMarkup] = _frozen_kb(
+    [btn("💳 Установить скидку", "onboarding_set_discount")],
+    [btn("⏭ Пропустить", "onboarding_skip_discount")]
+)
 
 
 def onboarding_discount_kb() -> InlineKeyboardMarkup:
     """Онбординг: настройка скидки."""
-    return simple_kb(
-        [btn("💳 Установить скидку", "onboarding_set_discount")],
-        [btn("⏭ Пропустить", "onboarding_skip_discount")]
-    )
+    return _ONBOARDING_DISCOUNT_KB
+
+
+_ONBOARDING_PVZ_KB: Final[InlineKeyboardMarkup] = _frozen_kb(
+    [btn("📍 Установить ПВЗ", "onboarding_set_pvz")],
+    [btn("⏭ Пропустить (Москва)", "onboarding_skip_pvz")]
+)
 
 
 def onboarding_pvz_kb() -> InlineKeyboardMarkup:
     """Онбординг: настройка ПВЗ."""
-    return simple_kb(
-        [btn("📍 Установить ПВЗ", "onboarding_set_pvz")],
-        [btn("⏭ Пропустить (Москва)", "onboarding_skip_pvz")]
-    )
+    return _ONBOARDING_PVZ_KB
 
 
 # ============= ТАРИФЫ =============
 
+_CHOOSE_PLAN_KB: Final[InlineKeyboardMarkup] = _frozen_kb(
+    [btn("🎁 Бесплатный (5 товаров)", "plan_free")],
+    [btn("💼 Базовый (50 товаров)", "plan_basic")],
+    [btn("🚀 Продвинутый (250 товаров)", "plan_pro")]
+)
+
+
 def choose_plan_kb() -> InlineKeyboardMarkup:
     """Выбор тарифа."""
-    return simple_kb(
-        [btn("🎁 Бесплатный (5 товаров)", "plan_free")],
-        [btn("💼 Базовый (50 товаров)", "plan_basic")],
-        [btn("🚀 Продвинутый (250 товаров)", "plan_pro")]
-    )
+    return _CHOOSE_PLAN_KB
+
+
+_SHOW_PLANS_KB: Final[InlineKeyboardMarkup] = _frozen_kb(
+    [btn("💼 Смотреть тариф Базовый", "plan_basic")],
+    [btn("🚀 Смотреть тариф Продвинутый", "plan_pro")],
+    [back_btn()]
+)
 
 
 def show_plans_kb() -> InlineKeyboardMarkup:
     """Просмотр тарифов."""
-    return simple_kb(
-        [btn("💼 Смотреть тариф Базовый", "plan_basic")],
-        [btn("🚀 Смотреть тариф Продвинутый", "plan_pro")],
-        [back_btn()]
-    )
+    return _SHOW_PLANS_KB
 
 
 def plan_detail_kb(plan_key: str) -> InlineKeyboardMarkup:
@@ -161,35 +236,44 @@ def plan_detail_kb(plan_key: str) -> InlineKeyboardMarkup:
     )
 
 
+_UPGRADE_PLAN_KB: Final[InlineKeyboardMarkup] = _frozen_kb(
+    [btn("⬆️ Улучшить тариф", "upgrade_plan")],
+    [back_btn()]
+)
+
+
 def upgrade_plan_kb() -> InlineKeyboardMarkup:
     """Улучшение тарифа."""
-    return simple_kb(
-        [btn("⬆️ Улучшить тариф", "upgrade_plan")],
-        [back_btn()]
-    )
+    return _UPGRADE_PLAN_KB
+
+
+_UPSELL_KB: Final[InlineKeyboardMarkup] = _frozen_kb(
+    [btn("🚀 Улучшить до Базового (199₽/мес)", "plan_basic")],
+    [btn("💎 Смотреть все тарифы", "show_plans_first")],
+    [btn("🗑 Удалить старый товар", "remove_product")],
+    [back_btn()]
+)
 
 
 def upsell_kb() -> InlineKeyboardMarkup:
     """Upsell клавиатура."""
-    return simple_kb(
-        [btn("🚀 Улучшить до Базового (199₽/мес)", "plan_basic")],
-        [btn("💎 Смотреть все тарифы", "show_plans_first")],
-        [btn("🗑 Удалить старый товар", "remove_product")],
-        [back_btn()]
-    )
+    return _UPSELL_KB
 
 
 # ============= НАСТРОЙКИ =============
 
+_SETTINGS_KB: Final[InlineKeyboardMarkup] = _frozen_kb(
+    [btn("💳 Скидка кошелька", "set_discount")],
+    [btn("📍 Мой ПВЗ", "show_pvz")],
+    [btn("📊 Сортировка товаров", "set_sort_mode")],
+    [btn("💰 Мой тариф", "my_plan")],
+    [back_btn()]
+)
+
+
 def settings_kb() -> InlineKeyboardMarkup:
     """Меню настроек."""
-    return simple_kb(
-        [btn("💳 Скидка кошелька", "set_discount")],
-        [btn("📍 Мой ПВЗ", "show_pvz")],
-        [btn("📊 Сортировка товаров", "set_sort_mode")],
-        [btn("💰 Мой тариф", "my_plan")],
-        [back_btn()]
-    )
+    return _SETTINGS_KB
 
 
 def sort_mode_kb(current_mode: str) -> InlineKeyboardMarkup:
@@ -204,17 +288,23 @@ def sort_mode_kb(current_mode: str) -> InlineKeyboardMarkup:
     )
 
 
+_BACK_TO_SETTINGS_KB: Final[InlineKeyboardMarkup] = _frozen_kb([back_btn("settings")])
+
+
 def back_to_settings_kb() -> InlineKeyboardMarkup:
     """Возврат к настройкам."""
-    return back_kb("settings")
+    return _BACK_TO_SETTINGS_KB
+
+
+_RESET_PVZ_KB: Final[InlineKeyboardMarkup] = _frozen_kb(
+    [btn("🔄 Изменить ПВЗ", "set_pvz")],
+    [btn("🔙 Назад", "settings")]
+)
 
 
 def reset_pvz_kb() -> InlineKeyboardMarkup:
     """Управление ПВЗ."""
-    return simple_kb(
-        [btn("🔄 Изменить ПВЗ", "set_pvz")],
-        [btn("🔙 Назад", "settings")]
-    )
+    return _RESET_PVZ_KB
 
 
 # ============= ТОВАРЫ =============
@@ -304,30 +394,39 @@ def products_list_kb(
     return simple_kb(*buttons)
 
 
+@lru_cache(maxsize=1024)
 def product_detail_kb(nm_id: int) -> InlineKeyboardMarkup:
-    """Детальная карточка товара."""
-    return simple_kb(
+    """Детальная карточка товара (кэшируется по nm_id)."""
+    return _frozen_kb(
         [btn("📈 График цен", f"show_graph:{nm_id}")],
         [btn("🔔 Настроить уведомления", f"notify_settings:{nm_id}")],
         [btn("✏️ Переименовать", f"rename:{nm_id}")],
-        [btn_url("🔗 Открыть на WB", f"https://www.wildberries.ru/catalog/{nm_id}/detail.aspx")],
+        [btn_url("🔗 Открыть на WB", _WB_URL_PRE + str(nm_id) + _WB_URL_SUF)],
         [btn("🗑 Удалить", f"rm:{nm_id}")],
         [btn("📋 Вернуться к списку", "list_products")]
     )
 
 
+def _trunc(text: str, limit: int) -> str:
+    """Обрезать текст до limit символов с многоточием."""
+    return text if len(text) <= limit else text[:limit - 3] + "..."
+
+
 def remove_products_kb(products: List[Dict]) -> InlineKeyboardMarkup:
     """Список товаров для удаления."""
-    buttons = []
-    
-    for product in products:
-        display_name = product['display_name']
-        if len(display_name) > 30:
-            display_name = display_name[:27] + "..."
-        buttons.append([btn(f"❌ {display_name}", f"rm:{product['nm_id']}")])
-    
+    # Локальные ссылки - список может быть до 250 товаров
+    button = InlineKeyboardButton
+    trunc = _trunc
+
+    buttons = [
+        [button(
+            text="❌ " + trunc(p["display_name"], 30),
+            callback_data="rm:" + str(p["nm_id"])
+        )]
+        for p in products
+    ]
     buttons.append([back_btn()])
-    return simple_kb(*buttons)
+    return InlineKeyboardMarkup(inline_keyboard=buttons)
 
 
 def confirm_remove_kb(nm_id: int) -> InlineKeyboardMarkup:
@@ -359,50 +458,62 @@ def notify_mode_kb(nm_id: int) -> InlineKeyboardMarkup:
 
 # ============= ЭКСПОРТ =============
 
+_EXPORT_FORMAT_KB: Final[InlineKeyboardMarkup] = _frozen_kb(
+    [btn("📗 Excel (.xlsx)", "export_excel")],
+    [btn("📄 CSV (.csv)", "export_csv")],
+    [back_btn()]
+)
+
+
 def export_format_kb() -> InlineKeyboardMarkup:
     """Выбор формата экспорта."""
-    return simple_kb(
-        [btn("📗 Excel (.xlsx)", "export_excel")],
-        [btn("📄 CSV (.csv)", "export_csv")],
-        [back_btn()]
-    )
+    return _EXPORT_FORMAT_KB
 
 
 # ============= НАВИГАЦИЯ =============
 
+_BACK_TO_MENU_KB: Final[InlineKeyboardMarkup] = _frozen_kb([back_btn()])
+
+
 def back_to_menu_kb() -> InlineKeyboardMarkup:
     """Возврат в главное меню."""
-    return back_kb()
+    return _BACK_TO_MENU_KB
 
 
 # ============= АДМИН ПАНЕЛЬ =============
 
+_ADMIN_MENU_KB: Final[InlineKeyboardMarkup] = _frozen_kb(
+    [
+        btn("📊 Статистика", "admin_stats"),
+        btn("🏥 Здоровье", "admin_health")
+    ],
+    [
+        btn("👥 Пользователи", "admin_users"),
+        btn("📦 Товары", "admin_products")
+    ],
+    [
+        btn("⚠️ Ошибки API", "admin_errors"),
+        btn("🔧 Система", "admin_system")
+    ],
+    [
+        btn("💳 Платежи", "admin_payments"),
+        btn("📨 Рассылка", "admin_broadcast")
+    ],
+    [btn("🔄 Обновить", "admin_menu")]
+)
+
+
 def admin_menu_kb() -> InlineKeyboardMarkup:
     """Админ панель."""
-    return simple_kb(
-        [
-            btn("📊 Статистика", "admin_stats"),
-            btn("🏥 Здоровье", "admin_health")
-        ],
-        [
-            btn("👥 Пользователи", "admin_users"),
-            btn("📦 Товары", "admin_products")
-        ],
-        [
-            btn("⚠️ Ошибки API", "admin_errors"),
-            btn("🔧 Система", "admin_system")
-        ],
-        [
-            btn("💳 Платежи", "admin_payments"),
-            btn("📨 Рассылка", "admin_broadcast")
-        ],
-        [btn("🔄 Обновить", "admin_menu")]
-    )
+    return _ADMIN_MENU_KB
+
+
+_BACK_TO_ADMIN_MENU_KB: Final[InlineKeyboardMarkup] = _frozen_kb([back_btn("admin_menu")])
 
 
 def back_to_admin_menu_kb() -> InlineKeyboardMarkup:
     """Возврат в админ меню."""
-    return back_kb("admin_menu")
+    return _BACK_TO_ADMIN_MENU_KB
 
 
 def user_management_kb(user_id: int) -> InlineKeyboardMarkup:
@@ -428,3 +539,55 @@ def plan_selection_kb(user_id: int) -> InlineKeyboardMarkup:
         [btn("🚀 Pro (250)", f"admin_set_plan:{user_id}:plan_pro:250")],
         [btn("« Отмена", f"admin_user_manage:{user_id}")]
     )
+
+
+# ============= РЕЕСТР КЛАВИАТУР =============
+
+# Статические клавиатуры - готовые синглтоны, параметризованные - фабрики.
+KEYBOARDS: Dict[str, InlineKeyboardMarkup | Callable[..., InlineKeyboardMarkup]] = {
+    "main": _MAIN_KB,
+    "start": _START_KB,
+    "onboarding": _ONBOARDING_KB,
+    "onboarding_discount": _ONBOARDING_DISCOUNT_KB,
+    "onboarding_pvz": _ONBOARDING_PVZ_KB,
+    "choose_plan": _CHOOSE_PLAN_KB,
+    "show_plans": _SHOW_PLANS_KB,
+    "upgrade_plan": _UPGRADE_PLAN_KB,
+    "upsell": _UPSELL_KB,
+    "settings": _SETTINGS_KB,
+    "back_to_settings": _BACK_TO_SETTINGS_KB,
+    "reset_pvz": _RESET_PVZ_KB,
+    "export_format": _EXPORT_FORMAT_KB,
+    "back_to_menu": _BACK_TO_MENU_KB,
+    "admin_menu": _ADMIN_MENU_KB,
+    "back_to_admin_menu": _BACK_TO_ADMIN_MENU_KB,
+    "smart_menu": create_smart_menu,
+    "plan_detail": plan_detail_kb,
+    "sort_mode": sort_mode_kb,
+    "sizes": sizes_inline_kb,
+    "products_list": products_list_kb,
+    "product_detail": product_detail_kb,
+    "remove_products": remove_products_kb,
+    "confirm_remove": confirm_remove_kb,
+    "back_to_product": back_to_product_kb,
+    "notify_mode": notify_mode_kb,
+    "user_management": user_management_kb,
+    "plan_selection": plan_selection_kb,
+}
+
+
+def get_keyboard(name: str, *args, **kwargs) -> InlineKeyboardMarkup:
+    """
+    Получить клавиатуру по имени.
+
+    Статические клавиатуры возвращаются без вызова функции,
+    для параметризованных вызывается фабрика с переданными аргументами.
+
+    Example:
+        get_keyboard("start")
+        get_keyboard("product_detail", nm_id)
+    """
+    kb = KEYBOARDS[name]
+    if isinstance(kb, InlineKeyboardMarkup):
+        return kb
+    return kb(*args, **kwargs)
@@ -2,38 +2,42 @@
 Главный файл бота - точка входа.
 """
 import asyncio
+import importlib
 import logging
-from typing import Callable, Dict, Any, Awaitable
+import multiprocessing
+import signal
+from pathlib import Path
+from types import MappingProxyType
+from typing import (
+    Any, Awaitable, Callable, Dict, Iterable, Optional, Set, Tuple
+)
 
-from aiogram import Bot, BaseMiddleware, Dispatcher
+from aiogram import Bot, BaseMiddleware, Dispatcher, Router
 from aiogram.types import BotCommand
 
 from config import settings
-from infrastructure.models import ProductRow
 from services.container import Container
 from infrastructure.db import DB
 from services.price_fetcher import PriceFetcher
 from services.monitor_service import MonitorService
+from services.notification_sender import (
+    GLOBAL_RATE, NotificationSender, set_global_rate
+)
 from services.background_service import BackgroundService
 from services.reporting_service import ReportingService
-from services.xpow_fetcher import get_xpow_fetcher
-
-# Импорт handlers
-from handlers import (
-    plan as plan_h,
-    start as start_h,
-    settings as settings_h,
-    region as region_h,
-    stats as stats_h,
-    onboarding as onboarding_h,
-    admin as admin_h,
-    products as products_h,
-    export as export_h
+from infrastructure.user_repository import disable_user_caches
+from services.xpow_fetcher import (
+    XPowFetcher, close_xpow_fetcher, get_xpow_fetcher
 )
 
 from utils.rate_limiter import RateLimitMiddleware
 from utils.error_tracker import get_error_tracker
 
+try:
+    import uvloop
+except ImportError:  # uvloop нет под Windows - работаем на стандартном цикле
+    uvloop = None
+
 # Настройка логирования
 logging.basicConfig(
     level=getattr(logging, settings.LOG_LEVEL),
@@ -41,13 +45,98 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Сколько ждать мягкой остановки монитора при выключении (сек)
+MONITOR_STOP_TIMEOUT = 30
+
+# Сколько ждать отправки очереди уведомлений при выключении (сек)
+NOTIFY_DRAIN_TIMEOUT = 30
+
+# Команды бота (меню Telegram)
+_BOT_COMMANDS: Tuple[BotCommand, ...] = (
+    BotCommand(command="start", description="🏠 Главное меню"),
+    BotCommand(
+        command="admin", description="🔧 Админ панель (только для админа)"
+    ),
+)
+
+# Модули handlers в порядке подключения роутеров. Модули импортируются
+# лениво в setup_dispatcher, DI подключается на каждый роутер отдельно -
+# с зависимостями из сигнатур его handlers (см. _router_dependencies)
+HANDLER_MODULES: Tuple[str, ...] = (
+    "handlers.plan",
+    "handlers.start",
+    "handlers.settings",
+    "handlers.region",
+    "handlers.stats",
+    "handlers.onboarding",
+    "handlers.admin",
+    "handlers.products",
+    "handlers.export",
+)
+
+
+def _build_dependencies(container: Container) -> Dict[str, Any]:
+    """Все зависимости, доступные handlers (ключ - имя параметра)."""
+    return {
+        # Репозитории
+        "user_repo": container.user_repo,
+        "product_repo": container.product_repo,
+        "price_history_repo": container.price_history_repo,
+
+        # Бизнес-сервисы
+        "user_service": container.user_service,
+        "settings_service": container.settings_service,
+        "product_manager": container.product_manager_service,
+        "price_history_service": container.price_history_service,
+        "product_analytics": container.product_analytics_service,
+
+        # Container для доступа к другим сервисам
+        "container": container,
+    }
+
+
+def _router_dependencies(router: Router, available: Iterable[str]) -> Set[str]:
+    """
+    Зависимости, которые запрашивают handlers роутера (и вложенных).
+
+    Берутся из сигнатур handlers - те же имена параметров, по которым
+    aiogram раскладывает data. Handler с **kwargs получает всё.
+    """
+    available = set(available)
+    needed: Set[str] = set()
+    for sub_router in router.chain_tail:
+        for observer in (sub_router.message, sub_router.callback_query):
+            for handler in observer.handlers:
+                if handler.varkw:
+                    return available
+                needed |= handler.params
+    return needed & available
+
 
 class DependencyInjectionMiddleware(BaseMiddleware):
     """Middleware для автоматической инъекции зависимостей в handlers."""
     
-    def __init__(self, container: Container):
+    def __init__(
+        self,
+        container: Container,
+        keys: Optional[Iterable[str]] = None
+    ):
+        """
+        Args:
+            container: Контейнер зависимостей
+            keys: Какие зависимости инжектить (None - все)
+        """
         super().__init__()
         self.container = container
+
+        # Провайдеры контейнера возвращают синглтоны -
+        # собираем зависимости один раз, а не на каждый апдейт.
+        # MappingProxyType - чтобы общий набор нельзя было случайно изменить
+        deps = _build_dependencies(container)
+        if keys is not None:
+            deps = {key: deps[key] for key in keys}
+
+        self._deps: MappingProxyType = MappingProxyType(deps)
     
     async def __call__(
         self,
@@ -55,157 +144,288 @@ class DependencyInjectionMiddleware(BaseMiddleware):
         event: Any,
         data: Dict[str, Any]
     ) -> Any:
-        # Инжектим репозитории
-        data["user_repo"] = self.container.get_user_repo()
-        data["product_repo"] = self.container.get_product_repo()
-        data["price_history_repo"] = self.container.get_price_history_repo()
-        
-        # Инжектим бизнес-сервисы
-        data["user_service"] = self.container.get_user_service()
-        data["settings_service"] = self.container.get_settings_service()
-        data["product_manager"] = self.container.get_product_manager_service()
-        data["price_history_service"] = self.container.get_price_history_service()
-        data["product_analytics"] = self.container.get_product_analytics_service()
-        
-        # Container для доступа к другим сервисам
-        data["container"] = self.container
-        
+        data.update(self._deps)
         return await handler(event, data)
 
 
+async def warmup_xpow() -> Optional[XPowFetcher]:
+    """
+    Прогрев XPowFetcher перед циклом мониторинга.
+
+    Returns:
+        XPowFetcher для использования в этом цикле или None,
+        если получить его не удалось
+    """
+    fetcher = None
+    try:
+        fetcher = await get_xpow_fetcher()
+        logger.info("🔥 Делаю прогрев перед циклом мониторинга...")
+        warmup_success = await fetcher.do_warmup_cycle()
+
+        if not warmup_success:
+            logger.warning("⚠️ Прогрев не удался, продолжаю без него")
+
+    except Exception as e:
+        logger.error("❌ Ошибка прогрева: %s", e)
+
+    return fetcher
+
+
+async def _sleep_until_tick(
+    monitor_service: MonitorService,
+    next_tick: float
+) -> float:
+    """
+    Дождаться дедлайна next_tick (по часам event loop).
+
+    Если цикл не уложился в интервал, не спим и не "догоняем"
+    пропущенные тики - отсчёт начинается заново от текущего момента.
+    Ожидание прерывается запросом остановки монитора.
+
+    Returns:
+        Момент, от которого считать следующий дедлайн
+    """
+    loop = asyncio.get_running_loop()
+    delay = next_tick - loop.time()
+    if delay > 0:
+        await monitor_service.wait_stop(delay)
+        return next_tick
+
+    logger.warning("⏱ Цикл мониторинга превысил интервал на %.1fs", -delay)
+    return loop.time()
+
+
+def _start_cycle_profiler(cycle_counter: int):
+    """
+    Запустить pyinstrument для цикла, если он попадает в выборку
+    (каждый PROFILE_EVERY-й цикл).
+
+    Returns:
+        Запущенный Profiler или None
+    """
+    if not settings.PROFILE_EVERY or cycle_counter % settings.PROFILE_EVERY:
+        return None
+
+    try:
+        from pyinstrument import Profiler
+    except ImportError:
+        logger.warning("⚠️ PROFILE_EVERY задан, но pyinstrument не установлен")
+        return None
+
+    profiler = Profiler(interval=0.005, async_mode="enabled")
+    profiler.start()
+    return profiler
+
+
+def _stop_cycle_profiler(profiler, cycle_counter: int, poll_interval: int):
+    """Остановить профайлер и вывести отчёт (HTML - если цикл затянулся)."""
+    session = profiler.stop()
+    logger.info(
+        "⏱ Профиль цикла #%d:\n%s",
+        cycle_counter,
+        profiler.output_text(unicode=True)
+    )
+
+    if session.duration > poll_interval:
+        path = Path("logs") / f"monitor_cycle_{cycle_counter}.html"
+        path.parent.mkdir(exist_ok=True)
+        path.write_text(profiler.output_html(), encoding="utf-8")
+        logger.warning(
+            "⏱ Цикл #%d длился %.1fs (> %ss), профиль: %s",
+            cycle_counter, session.duration, poll_interval, path
+        )
+
+
+async def run_monitor_cycle(
+    monitor_service: MonitorService,
+    reporting_service: ReportingService,
+    cycle_counter: int
+):
+    """Один цикл мониторинга: проверка всех товаров и отчётность."""
+    logger.info("Начинаю цикл мониторинга...")
+
+    # С запасом в полцикла: иначе товар, записанный в середине
+    # прошлого цикла, пропускал бы следующий
+    lookahead = settings.POLL_INTERVAL_SECONDS // 2
+    product_repo = monitor_service.container.product_repo
+
+    # Проверять нечего - не прогреваем браузер и не ходим в WB
+    if not await product_repo.has_due_products(lookahead):
+        logger.info("Нет товаров для проверки, цикл пропущен")
+        return
+
+    # Прогрев перед каждым циклом (fetcher переиспользуем до конца цикла)
+    xpow_fetcher = await warmup_xpow() if settings.USE_XPOW else None
+    
+    # Товары читаем курсором и обрабатываем пакетами по мере чтения.
+    # Размер пакета и задержку monitor_service подбирает сам
+    cycle_metrics = await monitor_service.process_batch(
+        product_repo.iter_due_product_rows(lookahead_seconds=lookahead)
+    )
+
+    checked = cycle_metrics["processed"] + cycle_metrics["errors"]
+    logger.info("📊 Проверено товаров: %d", checked)
+    
+    if not checked:
+        logger.info("Нет товаров для мониторинга")
+        return
+    
+    # Логируем результаты (строку собираем, только если её выведут)
+    if logger.isEnabledFor(logging.INFO):
+        logger.info(reporting_service.format_cycle_log(cycle_metrics))
+    
+    # Обновляем метрики
+    reporting_service.update_metrics(cycle_metrics)
+    
+    # Отчёт и проверка ошибок ходят в Telegram - в фоне, не задерживая цикл
+    if reporting_service.should_send_report():
+        monitor_service.spawn(
+            reporting_service.send_hourly_report(), name="hourly_report"
+        )
+    
+    monitor_service.spawn(
+        get_error_tracker().check_and_alert(), name="err_check"
+    )
+
+    # ✅ Выводим статистику ПОСЛЕ цикла (раз в N циклов)
+    if (
+        xpow_fetcher is not None
+        and cycle_counter % settings.XPOW_STATS_LOG_EVERY == 0
+        and logger.isEnabledFor(logging.INFO)
+    ):
+        try:
+            stats = xpow_fetcher.get_stats()
+            logger.info(
+                "📊 XPow stats: открытых вкладок=%s, сессий=%s, "
+                "запросов в текущей сессии=%s",
+                stats['open_pages'],
+                stats['total_sessions'],
+                stats['current_session_requests'],
+            )
+        except Exception as e:
+            logger.warning("⚠️ Не удалось получить статистику: %s", e)
+
+
 async def monitor_loop(
     monitor_service: MonitorService,
     reporting_service: ReportingService,
     poll_interval: int
 ):
     """Главный цикл мониторинга цен."""
-    logger.info(f"🔄 Запущен цикл мониторинга (интервал: {poll_interval}s)")
+    logger.info("🔄 Запущен цикл мониторинга (интервал: %ss)", poll_interval)
+
+    cycle_counter = 0
+    # Циклы стартуют раз в poll_interval от начала предыдущего,
+    # время работы цикла не прибавляется к интервалу
+    next_tick = asyncio.get_running_loop().time()
 
-    while True:
+    while not monitor_service.stop_requested:
+        cycle_counter += 1
+        next_tick += poll_interval
+        profiler = _start_cycle_profiler(cycle_counter)
         try:
-            # ✅ ДОБАВЬ ЭТО: Прогрев перед каждым циклом
-            if settings.USE_XPOW:
-                try:
-                    fetcher = await get_xpow_fetcher()
-                    logger.info("🔥 Делаю прогрев перед циклом мониторинга...")
-                    warmup_success = await fetcher.do_warmup_cycle()
-                    
-                    if not warmup_success:
-                        logger.warning("⚠️ Прогрев не удался, продолжаю без него")
-                    
-                    # Небольшая пауза после прогрева
-                    await asyncio.sleep(0.5)
-
-                except Exception as e:
-                    logger.error(f"❌ Ошибка прогрева: {e}")
-
-            logger.info("Начинаю цикл мониторинга...")
-            
-            # Получаем все товары
-            product_repo = monitor_service.container.get_product_repo()
-            products = await product_repo.get_all_products()
-            
-            logger.info(f"📊 Товаров в БД: {len(products)}")
-            
-            if not products:
-                logger.info("Нет товаров для мониторинга")
-                await asyncio.sleep(poll_interval)
-                continue
-            
-            # Конвертируем в ProductRow
-            product_rows = [ProductRow(**p) for p in products]
-            
-            # Обрабатываем товары пакетами
-            cycle_metrics = await monitor_service.process_batch(
-                product_rows,
-                batch_size=50,
-                delay_between_batches=1.0
+            await run_monitor_cycle(
+                monitor_service, reporting_service, cycle_counter
             )
             
-            # Логируем результаты
-            logger.info(reporting_service.format_cycle_log(cycle_metrics))
-            
-            # Обновляем метрики
-            reporting_service.update_metrics(cycle_metrics)
-            
-            # Отправляем отчёт если нужно
-            if reporting_service.should_send_report():
-                await reporting_service.send_hourly_report()
-            
-            # Проверяем метрики ошибок
-            error_tracker = get_error_tracker()
-            await error_tracker.check_and_alert()
-
-            # ✅ Выводим статистику ПОСЛЕ цикла
-            if settings.USE_XPOW:
-                try:
-                    fetcher = await get_xpow_fetcher()
-                    stats = fetcher.get_stats()
-                    logger.info(
-                        f"📊 XPow stats: открытых вкладок={stats['open_pages']}, "
-                        f"сессий={stats['total_sessions']}, "
-                        f"запросов в текущей сессии={stats['current_session_requests']}"
-                    )
-                except Exception as e:
-                    logger.warning(f"⚠️ Не удалось получить статистику: {e}")
-
-            await asyncio.sleep(poll_interval)
-            
         except Exception as e:
-            logger.exception(f"Критическая ошибка в monitor_loop: {e}")
-            await asyncio.sleep(poll_interval)
+            logger.exception("Критическая ошибка в monitor_loop: %s", e)
+            await monitor_service.wait_stop(poll_interval)
+            next_tick = asyncio.get_running_loop().time()
+            continue
+
+        finally:
+            if profiler is not None:
+                _stop_cycle_profiler(profiler, cycle_counter, poll_interval)
+
+        next_tick = await _sleep_until_tick(monitor_service, next_tick)
+
+    await monitor_service.wait_background_tasks()
+    logger.info("🛑 Цикл мониторинга остановлен")
 
 
 async def setup_bot_commands(bot: Bot):
     """Установка команд бота."""
-    await bot.set_my_commands([
-        BotCommand(command="start", description="🏠 Главное меню"),
-        BotCommand(
-            command="admin", description="🔧 Админ панель (только для админа)"
-        ),
-    ])
+    await bot.set_my_commands(list(_BOT_COMMANDS))
     logger.info("✅ Команды бота установлены")
 
 
 def setup_dispatcher(dp: Dispatcher, container: Container):
     """Настройка диспетчера: подключение handlers и middleware."""
     
-    # Подключаем handlers
-    dp.include_router(start_h.router)
-    dp.include_router(plan_h.router)
-    dp.include_router(settings_h.router)
-    dp.include_router(region_h.router)
-    dp.include_router(stats_h.router)
-    dp.include_router(onboarding_h.router)
-    dp.include_router(admin_h.router)
-    dp.include_router(products_h.router)
-    dp.include_router(export_h.router)
+    # Подключаем handlers (импорт модулей - только здесь).
+    # DI - inner middleware роутера: срабатывает только для апдейтов,
+    # которые дошли до его handlers, и кладёт лишь нужные им зависимости
+    available = _build_dependencies(container).keys()
+    for module_name in HANDLER_MODULES:
+        router = importlib.import_module(module_name).router
+        deps = _router_dependencies(router, available)
+        if deps:
+            di = DependencyInjectionMiddleware(container, deps)
+            router.message.middleware(di)
+            router.callback_query.middleware(di)
+        dp.include_router(router)
     
     # Подключаем middleware
     dp.message.middleware(RateLimitMiddleware(rate_limit=3))
-    dp.update.middleware(DependencyInjectionMiddleware(container))
     
     logger.info("✅ Dispatcher настроен")
 
 
-async def initialize_services(bot: Bot) -> tuple:
-    """Инициализация всех сервисов."""
-    # Создаём подключение к БД
-    db = DB(str(settings.DATABASE_DSN))
-    await db.connect()
-    logger.info("✅ Подключение к БД установлено")
-    
-    # ✅ ДОБАВЬ: Инициализация XPowFetcher ПЕРЕД PriceFetcher
-    if settings.USE_XPOW:
+async def initialize_services(bot: Bot, with_monitor: bool = True) -> tuple:
+    """
+    Инициализация всех сервисов.
+
+    Args:
+        bot: Экземпляр бота
+        with_monitor: Создавать ли мониторинг (и заранее запускать браузер
+                      XPow). False - для процесса бота, когда мониторинг
+                      работает в отдельном процессе: тогда вместо
+                      monitor_service и reporting_service вернётся None
+    """
+    # По умолчанию пул рассчитан на одновременные записи монитора
+    # (MONITOR_CONCURRENCY) плюс курсор цикла и запросы handlers
+    max_size = settings.DB_POOL_MAX or max(
+        10, settings.MONITOR_CONCURRENCY + 5
+    )
+    db = DB(
+        str(settings.DATABASE_DSN),
+        min_size=min(settings.DB_POOL_MIN, max_size),
+        max_size=max_size
+    )
+
+    # Подключение к БД и запуск браузера XPowFetcher независимы -
+    # выполняем их параллельно, PriceFetcher создаём после обоих
+    startup = [db.connect()]
+    if settings.USE_XPOW and with_monitor:
         logger.info("🔥 Инициализирую XPowFetcher...")
-        try:
-            fetcher_instance = await get_xpow_fetcher()
+        startup.append(get_xpow_fetcher())
+
+    db_result, *xpow_result = await asyncio.gather(
+        *startup, return_exceptions=True
+    )
+
+    if isinstance(db_result, BaseException):
+        # Браузер мог успеть запуститься - без БД он не нужен, а сам
+        # процесс Chromium при выходе не закроется
+        if xpow_result and not isinstance(xpow_result[0], BaseException):
+            await close_xpow_fetcher()
+        raise db_result
+    logger.info("✅ Подключение к БД установлено")
+
+    if xpow_result:
+        if isinstance(xpow_result[0], BaseException):
+            logger.error(
+                "❌ Не удалось инициализировать XPowFetcher: %s", xpow_result[0]
+            )
+        else:
             logger.info("✅ XPowFetcher готов")
-        except Exception as e:
-            logger.error(f"❌ Не удалось инициализировать XPowFetcher: {e}")
-    
+
     # Создаём PriceFetcher
-    fetcher = PriceFetcher(use_xpow=settings.USE_XPOW)
+    fetcher = PriceFetcher(
+        concurrency=settings.MONITOR_CONCURRENCY,
+        use_xpow=settings.USE_XPOW
+    )
     if settings.USE_XPOW:
         logger.info("✅ PriceFetcher настроен с X-POW токеном")
     else:
@@ -215,23 +435,24 @@ async def initialize_services(bot: Bot) -> tuple:
     container = Container(db=db, price_fetcher=fetcher)
     
     # Создаём сервисы
-    monitor_service = MonitorService(container, bot)
-    background_service = BackgroundService(container, bot)
-    reporting_service = ReportingService(bot, settings.POLL_INTERVAL_SECONDS)
+    notifier = NotificationSender(bot)
+    background_service = BackgroundService(container, bot, notifier)
+    monitor_service = reporting_service = None
+    if with_monitor:
+        monitor_service = MonitorService(container, bot, notifier)
+        reporting_service = ReportingService(
+            bot, settings.POLL_INTERVAL_SECONDS
+        )
     
     logger.info("✅ Все сервисы инициализированы")
     
     return container, monitor_service, background_service, reporting_service
 
 
-async def cleanup_services(container: Container, background_tasks: list):
+async def cleanup_services(container: Container):
     """Очистка ресурсов при завершении."""
     logger.info("🛑 Начинаю остановку сервисов...")
     
-    # Отменяем фоновые задачи
-    if background_tasks:
-        await BackgroundService.cancel_all_tasks(background_tasks)
-    
     # ← ДОБАВЬ: Закрываем все активные соединения
     if container.db.pool:
         try:
@@ -239,15 +460,14 @@ async def cleanup_services(container: Container, background_tasks: list):
             await container.db.pool.expire_connections()
             logger.info("✅ Активные соединения БД закрыты")
         except Exception as e:
-            logger.warning(f"Ошибка при закрытии соединений: {e}")
+            logger.warning("Ошибка при закрытии соединений: %s", e)
     
     # Закрываем XPowFetcher
     try:
-        from services.xpow_fetcher import close_xpow_fetcher
         await close_xpow_fetcher()
         logger.info("✅ XPowFetcher закрыт")
     except Exception as e:
-        logger.warning(f"Ошибка при закрытии XPowFetcher: {e}")
+        logger.warning("Ошибка при закрытии XPowFetcher: %s", e)
     
     # Закрываем PriceFetcher
     await container.price_fetcher.close()
@@ -258,6 +478,103 @@ async def cleanup_services(container: Container, background_tasks: list):
     logger.info("✅ Все сервисы остановлены")
 
 
+def _run(coro) -> None:
+    """Запустить корутину на uvloop, если он доступен."""
+    if uvloop is not None:
+        uvloop.run(coro)
+    else:
+        asyncio.run(coro)
+
+
+async def monitor_process_main():
+    """
+    Мониторинг в отдельном процессе.
+
+    Свои пул БД, PriceFetcher и Bot (только для отправки уведомлений) -
+    разбор ответов WB не отнимает GIL у handlers бота.
+    """
+    # Лимит Telegram общий на бота - делим его с процессом бота
+    set_global_rate(GLOBAL_RATE / 2)
+
+    bot = Bot(token=settings.BOT_TOKEN)
+    container, monitor_service, _, reporting_service = \
+        await initialize_services(bot)
+
+    # Пользователей меняет процесс бота - кэши этого процесса он
+    # не сбросит, поэтому здесь настройки всегда читаются из БД
+    disable_user_caches()
+
+    # Ошибки WB копятся в error tracker этого процесса - алерты по ним
+    # отправляем отсюда же
+    async def send_error_alert(alert_data: Dict):
+        monitor_service.notifier.enqueue(
+            settings.ADMIN_CHAT_ID, alert_data['message'], parse_mode="HTML"
+        )
+
+    get_error_tracker().register_alert_callback(send_error_alert)
+
+    # Родитель останавливает процесс через SIGTERM - мягко, как и в
+    # однопроцессном режиме
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        try:
+            loop.add_signal_handler(sig, monitor_service.request_stop)
+        except NotImplementedError:  # Windows
+            pass
+
+    try:
+        async with asyncio.TaskGroup() as tg:
+            sender_task = tg.create_task(
+                monitor_service.notifier.run(), name="notification_sender"
+            )
+            await monitor_loop(
+                monitor_service,
+                reporting_service,
+                settings.POLL_INTERVAL_SECONDS
+            )
+            await monitor_service.notifier.drain(NOTIFY_DRAIN_TIMEOUT)
+            sender_task.cancel()
+    finally:
+        await cleanup_services(container)
+        await bot.session.close()
+
+
+def _monitor_process_entry() -> None:
+    """Точка входа процесса мониторинга."""
+    _run(monitor_process_main())
+
+
+def _start_monitor_process() -> multiprocessing.Process:
+    """Запустить мониторинг в отдельном процессе."""
+    # spawn, а не fork: родитель уже держит event loop, потоки
+    # и браузер XPow - их копия в дочернем процессе неработоспособна
+    process = multiprocessing.get_context("spawn").Process(
+        target=_monitor_process_entry, name="monitor"
+    )
+    process.start()
+    logger.info("✅ Монитор цен запущен в процессе pid=%s", process.pid)
+    return process
+
+
+async def _stop_monitor_process(process: multiprocessing.Process) -> None:
+    """Мягко остановить процесс мониторинга, убить - если не уложился."""
+    if not process.is_alive():
+        logger.warning(
+            "⚠️ Процесс мониторинга уже завершился (код %s)", process.exitcode
+        )
+        return
+
+    # Процесс дообрабатывает товары, а затем отправляет очередь уведомлений
+    process.terminate()
+    await asyncio.to_thread(
+        process.join, MONITOR_STOP_TIMEOUT + NOTIFY_DRAIN_TIMEOUT
+    )
+    if process.is_alive():
+        logger.warning("⚠️ Монитор не остановился вовремя, завершаю процесс")
+        process.kill()
+        await asyncio.to_thread(process.join)
+
+
 async def main():
     """Главная функция запуска бота."""
     logger.info("🚀 Запуск бота...")
@@ -269,7 +586,9 @@ async def main():
     # ✅ ИЗМЕНИ: Инициализируем сервисы (с прогревом внутри)
     logger.info("🔧 Инициализирую сервисы...")
     container, monitor_service, background_service, reporting_service = \
-        await initialize_services(bot)
+        await initialize_services(
+            bot, with_monitor=not settings.MONITOR_SEPARATE_PROCESS
+        )
     logger.info("✅ Все сервисы готовы к работе")
     
     # Настраиваем dispatcher
@@ -278,45 +597,85 @@ async def main():
     # Устанавливаем команды
     await setup_bot_commands(bot)
     
-    # Запускаем фоновые задачи
-    background_tasks = background_service.start_all_tasks()
-    
-    # ✅ ДОБАВЬ: Логируем перед стартом монитора
     logger.info("🎯 Запускаю цикл мониторинга цен...")
-    
-    # Запускаем цикл мониторинга
-    monitor_task = asyncio.create_task(
-        monitor_loop(
-            monitor_service,
-            reporting_service,
-            settings.POLL_INTERVAL_SECONDS
-        ),
-        name="monitor_loop"
-    )
-    logger.info("✅ Монитор цен запущен")
-    
+    monitor_process = None
+    if settings.MONITOR_SEPARATE_PROCESS:
+        # Вторую половину лимита Telegram берёт процесс мониторинга
+        set_global_rate(GLOBAL_RATE / 2)
+        monitor_process = _start_monitor_process()
+
     try:
-        logger.info("✅ Бот готов к работе")
-        
-        # Запускаем polling
-        await dp.start_polling(
-            bot,
-            allowed_updates=["message", "callback_query"]
-        )
+        # Монитор и фоновые задачи живут в одной TaskGroup: падение любой
+        # из них останавливает polling, а при выходе все они гарантированно
+        # отменены и дождались завершения
+        async with asyncio.TaskGroup() as tg:
+            monitor_task = None
+            if monitor_process is None:
+                monitor_task = tg.create_task(
+                    monitor_loop(
+                        monitor_service,
+                        reporting_service,
+                        settings.POLL_INTERVAL_SECONDS
+                    ),
+                    name="monitor_loop"
+                )
+                logger.info("✅ Монитор цен запущен")
+
+            background_tasks = [
+                tg.create_task(factory(), name=name)
+                for name, factory in background_service.task_factories()
+            ]
+            logger.info("✅ Запущено %d фоновых задач", len(background_tasks))
+
+            logger.info("✅ Бот готов к работе")
+            
+            # Запускаем polling
+            await dp.start_polling(
+                bot,
+                allowed_updates=["message", "callback_query"]
+            )
+
+            # Монитору даём дообработать начатые товары (записи в БД
+            # и уведомления), отменяем только если он не уложился
+            if monitor_task is not None:
+                monitor_service.request_stop()
+                done, _ = await asyncio.wait(
+                    {monitor_task}, timeout=MONITOR_STOP_TIMEOUT
+                )
+                if not done:
+                    logger.warning(
+                        "⚠️ Монитор не остановился вовремя, отменяю"
+                    )
+                    monitor_task.cancel()
+
+            # Гасим бесконечные циклы - после монитора, чтобы его
+            # уведомления успели попасть в очередь. Отправку - последней:
+            # admin_alerts при отмене сбрасывает в неё накопленные алерты
+            sender_tasks = [
+                task for task in background_tasks
+                if task.get_name() == "notification_sender"
+            ]
+            loops = [
+                task for task in background_tasks if task not in sender_tasks
+            ]
+            for task in loops:
+                task.cancel()
+            if loops:
+                await asyncio.wait(loops)
+
+            await background_service.notifier.drain(NOTIFY_DRAIN_TIMEOUT)
+            for task in sender_tasks:
+                task.cancel()
         
     except KeyboardInterrupt:
         logger.info("⛔ Получен сигнал остановки (Ctrl+C)")
         
     finally:
-        # Отменяем монитор
-        monitor_task.cancel()
-        try:
-            await monitor_task
-        except asyncio.CancelledError:
-            logger.info("Monitor loop cancelled")
-        
+        if monitor_process is not None:
+            await _stop_monitor_process(monitor_process)
+
         # Очищаем ресурсы
-        await cleanup_services(container, background_tasks)
+        await cleanup_services(container)
         
         # Закрываем сессию бота
         await bot.session.close()
@@ -326,6 +685,6 @@ async def main():
 
 if __name__ == "__main__":
     try:
-        asyncio.run(main())
+        _run(main())
     except KeyboardInterrupt:
         logger.info("Остановка через Ctrl+C")
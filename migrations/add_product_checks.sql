@@ -0,0 +1,6 @@
+CREATE TABLE IF NOT EXISTS product_checks (
+    product_id INT PRIMARY KEY REFERENCES products(id) ON DELETE CASCADE,
+    next_check_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT now(),
+    check_interval INT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_product_checks_next_check_at ON product_checks(next_check_at);
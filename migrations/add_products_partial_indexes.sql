@@ -0,0 +1,8 @@
+-- Частичные индексы для статистики товаров (count_out_of_stock*,
+-- get_cheapest / get_most_expensive). CONCURRENTLY - без блокировки
+-- записи в products; выполнять вне транзакции (psql -f).
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_products_oos_user
+    ON products(user_id) WHERE out_of_stock;
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_products_user_price_instock
+    ON products(user_id, last_product_price)
+    WHERE out_of_stock = false AND last_product_price > 0;
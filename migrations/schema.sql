@@ -42,9 +42,20 @@ CREATE TABLE IF NOT EXISTS price_history (
     recorded_at TIMESTAMP WITH TIME ZONE DEFAULT now()
 );
 
+-- product_checks: когда проверять товар в следующий раз
+-- (у давно не менявшихся товаров интервал растёт)
+CREATE TABLE IF NOT EXISTS product_checks (
+    product_id INT PRIMARY KEY REFERENCES products(id) ON DELETE CASCADE,
+    next_check_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT now(),
+    check_interval INT NOT NULL              -- текущий интервал, сек
+);
+
 -- Индексы для оптимизации
 CREATE INDEX IF NOT EXISTS idx_products_user_id ON products(user_id);
 CREATE INDEX IF NOT EXISTS idx_products_nm_id ON products(nm_id);
 CREATE INDEX IF NOT EXISTS idx_products_updated_at ON products(updated_at);
 CREATE INDEX IF NOT EXISTS idx_price_history_product_id ON price_history(product_id);
-CREATE INDEX IF NOT EXISTS idx_price_history_recorded_at ON price_history(recorded_at);
\ No newline at end of file
+CREATE INDEX IF NOT EXISTS idx_price_history_recorded_at ON price_history(recorded_at);
+CREATE INDEX IF NOT EXISTS idx_product_checks_next_check_at ON product_checks(next_check_at);
+CREATE INDEX IF NOT EXISTS idx_products_oos_user ON products(user_id) WHERE out_of_stock;
+CREATE INDEX IF NOT EXISTS idx_products_user_price_instock ON products(user_id, last_product_price) WHERE out_of_stock = false AND last_product_price > 0;
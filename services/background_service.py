@@ -3,18 +3,32 @@
 """
 import asyncio
 import logging
-import subprocess
 from datetime import datetime, timedelta
-from typing import Dict
+from functools import partial
+from typing import Any, Callable, Coroutine, Dict
 
 from aiogram import Bot
 from services.container import Container
+from services.notification_sender import NotificationSender
 from utils.health_monitor import get_health_monitor
 from utils.error_tracker import get_error_tracker
 from config import settings
 
 logger = logging.getLogger(__name__)
 
+# Шаг ожидания по расписанию: asyncio.sleep идёт по монотонным часам,
+# которые не учитывают сон системы и перевод часов
+_SCHEDULE_CHECK_SECONDS = 600
+
+
+async def _sleep_until(target: datetime) -> None:
+    """Ждать наступления target по настенным часам."""
+    while True:
+        remaining = (target - datetime.now()).total_seconds()
+        if remaining <= 0:
+            return
+        await asyncio.sleep(min(remaining, _SCHEDULE_CHECK_SECONDS))
+
 
 class BackgroundService:
     """
@@ -26,11 +40,27 @@ class BackgroundService:
     - Health checks
     """
 
-    def __init__(self, container: Container, bot: Bot):
+    # Алерты за ALERT_FLUSH_SECONDS уходят админу одним сообщением
+    ALERT_FLUSH_SECONDS = 5
+    ALERT_SEPARATOR = "\n\n---\n\n"
+    MESSAGE_MAX_LENGTH = 4096
+
+    def __init__(
+        self,
+        container: Container,
+        bot: Bot,
+        notifier: NotificationSender
+    ):
         self.container = container
         self.bot = bot
-        self.price_history_repo = container.get_price_history_repo()
-        self.product_repo = container.get_product_repo()
+        self.notifier = notifier
+        self.price_history_repo = container.price_history_repo
+        self.product_repo = container.product_repo
+        self._pending_alerts: list[str] = []
+        # Все сообщения админу - HTML в один чат, связываем один раз
+        self._notify_admin = partial(
+            notifier.enqueue, settings.ADMIN_CHAT_ID, parse_mode="HTML"
+        )
     
     async def cleanup_old_data_loop(self):
         """Периодическая очистка старых данных (раз в сутки)."""
@@ -41,7 +71,8 @@ class BackgroundService:
                 logger.info("Запуск очистки старых данных...")
                 
                 # Очистка истории по тарифам
-                deleted = await self.price_history_repo.cleanup_by_plan()
+                cleanup_service = self.container.cleanup_service
+                deleted = await cleanup_service.cleanup_history_by_plans()
                 
                 logger.info(
                     f"✅ История цен очищена: "
@@ -66,162 +97,146 @@ class BackgroundService:
                 if now > target:
                     target += timedelta(days=1)
                 
-                wait_seconds = (target - now).total_seconds()
-                
                 logger.info(
                     f"Следующий бэкап запланирован на "
                     f"{target.strftime('%d.%m.%Y %H:%M')}"
                 )
                 
-                await asyncio.sleep(wait_seconds)
+                await _sleep_until(target)
                 
                 # Выполняем бэкап
                 logger.info("🔄 Запуск автоматического бэкапа...")
                 
                 backup_name = f"auto_{datetime.now().strftime('%Y%m%d')}"
                 
-                result = subprocess.run(
-                    ["bash", "scripts/backup.sh", backup_name],
-                    capture_output=True,
-                    text=True,
-                    timeout=300  # 5 минут на бэкап
+                # Асинхронный процесс: бэкап не блокирует event loop
+                proc = await asyncio.create_subprocess_exec(
+                    "bash", "scripts/backup.sh", backup_name,
+                    stdout=asyncio.subprocess.PIPE,
+                    stderr=asyncio.subprocess.PIPE
                 )
+                try:
+                    _, stderr = await asyncio.wait_for(
+                        proc.communicate(),
+                        timeout=300  # 5 минут на бэкап
+                    )
+                except (asyncio.TimeoutError, asyncio.CancelledError):
+                    proc.kill()
+                    await proc.wait()
+                    raise
+                stderr = stderr.decode(errors="replace")
                 
-                if result.returncode == 0:
+                if proc.returncode == 0:
                     logger.info("✅ Автоматический бэкап выполнен успешно")
                     
                     # Уведомляем админа
-                    await self.bot.send_message(
-                        settings.ADMIN_CHAT_ID,
+                    self._notify_admin(
                         "✅ Автоматический бэкап БД выполнен успешно"
                     )
                 else:
                     logger.error(
-                        f"❌ Ошибка бэкапа: {result.stderr}"
+                        f"❌ Ошибка бэкапа: {stderr}"
                     )
                     
                     # Уведомляем админа об ошибке
-                    await self.bot.send_message(
-                        settings.ADMIN_CHAT_ID,
+                    self._notify_admin(
                         f"❌ Ошибка автоматического бэкапа:\n"
-                        f"<code>{result.stderr[:500]}</code>",
-                        parse_mode="HTML"
+                        f"<code>{stderr[:500]}</code>"
                     )
                     
-            except subprocess.TimeoutExpired:
+            except asyncio.TimeoutError:
                 logger.error("❌ Бэкап превысил таймаут 5 минут")
                 
             except Exception as e:
                 logger.exception(f"Ошибка при автоматическом бэкапе: {e}")
     
-    async def health_check_loop(self):
-        """Периодическая проверка здоровья системы (каждые 5 минут)."""
-        monitor = get_health_monitor()
-        
-        # Регистрируем callback для алертов
-        async def send_health_alert(alert_data: Dict):
-            try:
-                await self.bot.send_message(
-                    settings.ADMIN_CHAT_ID,
-                    alert_data['message'],
-                    parse_mode="HTML"
-                )
-            except Exception as e:
-                logger.exception(f"Failed to send health alert: {e}")
-        
-        monitor.register_alert_callback(send_health_alert)
-        
-        while True:
-            try:
-                await asyncio.sleep(300)  # 5 минут
-                
-                logger.info("Выполняю проверку здоровья системы...")
-                
-                health_data = await monitor.perform_full_check(
-                    self.container.db
-                )
-                
-                status = health_data['overall_status']
-                
-                if status.value != "healthy":
-                    logger.warning(f"Health check: {status.value}")
-                else:
-                    logger.info("Health check: система здорова")
-                
-            except Exception as e:
-                logger.exception(f"Ошибка в health_check_loop: {e}")
-                await asyncio.sleep(300)
-    
-    async def error_tracking_loop(self):
+    async def _send_admin_alert(self, alert_data: Dict):
+        """Callback алертов health monitor и error tracker."""
+        self._pending_alerts.append(alert_data['message'])
+
+    def _flush_alerts(self) -> None:
+        """Отправить накопленные алерты (длинные - частями)."""
+        if not self._pending_alerts:
+            return
+
+        pending, self._pending_alerts = self._pending_alerts, []
+        text = pending[0]
+        for alert in pending[1:]:
+            joined_length = len(text) + len(self.ALERT_SEPARATOR) + len(alert)
+            if joined_length > self.MESSAGE_MAX_LENGTH:
+                self._notify_admin(text)
+                text = alert
+            else:
+                text += self.ALERT_SEPARATOR + alert
+        self._notify_admin(text)
+
+    async def admin_alerts_loop(self):
+        """Раз в ALERT_FLUSH_SECONDS отправлять накопленные алерты."""
+        try:
+            while True:
+                await asyncio.sleep(self.ALERT_FLUSH_SECONDS)
+                self._flush_alerts()
+        finally:
+            self._flush_alerts()
+
+    async def _health_check(self, monitor):
+        """Проверка здоровья системы."""
+        logger.info("Выполняю проверку здоровья системы...")
+
+        health_data = await monitor.perform_full_check(self.container.db)
+
+        status = health_data['overall_status']
+
+        if status.value != "healthy":
+            logger.warning(f"Health check: {status.value}")
+        else:
+            logger.info("Health check: система здорова")
+
+    async def periodic_checks_loop(self):
         """
-        Периодическая проверка метрик ошибок API.
-        Проверяет каждые 5 минут.
+        Проверка здоровья системы и метрик ошибок API (каждые 5 минут).
+
+        Обе проверки идут на одном таймере и выполняются параллельно:
+        health check ждёт БД, error tracker - отправку алертов.
         """
+        monitor = get_health_monitor()
         tracker = get_error_tracker()
-        
+
         # Регистрируем callback для алертов
-        async def send_error_alert(alert_data: Dict):
-            try:
-                await self.bot.send_message(
-                    settings.ADMIN_CHAT_ID,
-                    alert_data['message'],
-                    parse_mode="HTML"
-                )
-            except Exception as e:
-                logger.exception(f"Failed to send error alert: {e}")
-        
-        tracker.register_alert_callback(send_error_alert)
-        
+        monitor.register_alert_callback(self._send_admin_alert)
+        tracker.register_alert_callback(self._send_admin_alert)
+
         while True:
-            try:
-                await asyncio.sleep(300)  # 5 минут
-                
-                # Проверяем и отправляем алерты при необходимости
-                await tracker.check_and_alert()
-                
-            except Exception as e:
-                logger.exception(f"Ошибка в error_tracking_loop: {e}")
-                await asyncio.sleep(300)
-    
-    def start_all_tasks(self) -> list[asyncio.Task]:
+            await asyncio.sleep(300)  # 5 минут
+
+            results = await asyncio.gather(
+                self._health_check(monitor),
+                tracker.check_and_alert(),
+                return_exceptions=True
+            )
+            checks = ("health_check", "error_tracking")
+            for name, result in zip(checks, results):
+                if isinstance(result, Exception):
+                    logger.error(
+                        "Ошибка периодической проверки %s: %s",
+                        name, result, exc_info=result
+                    )
+
+    def task_factories(
+        self
+    ) -> list[tuple[str, Callable[[], Coroutine[Any, Any, None]]]]:
         """
-        Запустить все фоновые задачи.
+        Фоновые задачи для запуска в asyncio.TaskGroup.
+
+        Сами задачи запускает и отменяет вызывающий код.
         
         Returns:
-            Список Task объектов
+            Список пар (имя задачи, функция, создающая корутину)
         """
-        tasks = [
-            asyncio.create_task(
-                self.cleanup_old_data_loop(),
-                name="cleanup_data"
-            ),
-            asyncio.create_task(
-                self.auto_backup_loop(),
-                name="auto_backup"
-            ),
-            asyncio.create_task(
-                self.health_check_loop(),
-                name="health_check"
-            ),
-            asyncio.create_task(
-                self.error_tracking_loop(),
-                name="error_tracking"
-            )
+        return [
+            ("cleanup_data", self.cleanup_old_data_loop),
+            ("auto_backup", self.auto_backup_loop),
+            ("periodic_checks", self.periodic_checks_loop),
+            ("admin_alerts", self.admin_alerts_loop),
+            ("notification_sender", self.notifier.run),
         ]
-        
-        logger.info(
-            f"✅ Запущено {len(tasks)} фоновых задач: "
-            f"{', '.join(t.get_name() for t in tasks)}"
-        )
-        
-        return tasks
-    
-    @staticmethod
-    async def cancel_all_tasks(tasks: list[asyncio.Task]):
-        """Отменить все фоновые задачи."""
-        for task in tasks:
-            task.cancel()
-            try:
-                await task
-            except asyncio.CancelledError:
-                logger.info(f"Task {task.get_name()} cancelled")
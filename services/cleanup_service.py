@@ -3,7 +3,6 @@
 Знает о бизнес-правилах (планы, сроки хранения).
 """
 import logging
-from datetime import datetime, timedelta
 from typing import Dict
 from infrastructure.user_repository import UserRepository
 from infrastructure.product_repository import ProductRepository
@@ -43,39 +42,23 @@ class CleanupService:
         """
         Очистить историю согласно тарифам пользователей.
 
-        Процесс:
-        1. Получить всех пользователей
-        2. Сгруппировать по планам
-        3. Для каждого плана - найти товары и удалить старую историю
+        Вся история удаляется одним запросом: срок хранения берётся
+        по плану владельца товара.
 
         Returns:
             Dict с количеством удалённых записей по планам
         """
         logger.info("Начинаю очистку истории по планам")
 
-        results = {
-            "plan_free": 0,
-            "plan_basic": 0,
-            "plan_pro": 0,
-        }
-
-        # Обрабатываем каждый план
-        for plan_key, retention_days in HISTORY_RETENTION_DAYS.items():
-            try:
-                deleted = await self._cleanup_for_plan(
-                    plan_key, retention_days
-                )
-                results[plan_key] = deleted
-
-                logger.info(
-                    f"План {plan_key}: удалено {deleted} записей "
-                    f"(старше {retention_days} дней)"
-                )
-
-            except Exception as e:
-                logger.exception(
-                    f"Ошибка при очистке истории для плана {plan_key}: {e}"
-                )
+        results = await self.price_history_repo.delete_older_than_by_plan(
+            HISTORY_RETENTION_DAYS
+        )
+
+        for plan_key, deleted in results.items():
+            logger.info(
+                f"План {plan_key}: удалено {deleted} записей "
+                f"(старше {HISTORY_RETENTION_DAYS[plan_key]} дней)"
+            )
 
         total_deleted = sum(results.values())
         logger.info(
@@ -84,50 +67,6 @@ class CleanupService:
 
         return results
 
-    async def _cleanup_for_plan(
-        self,
-        plan_key: str,
-        retention_days: int
-    ) -> int:
-        """
-        Очистить историю для конкретного плана.
-
-        Args:
-            plan_key: Ключ плана (plan_free, plan_basic, plan_pro)
-            retention_days: Срок хранения в днях
-
-        Returns:
-            Количество удалённых записей
-        """
-        # 1. Получаем пользователей с этим планом
-        users = await self.user_repo.get_by_plan(plan_key)
-
-        if not users:
-            logger.debug(f"Нет пользователей с планом {plan_key}")
-            return 0
-
-        user_ids = [user.id for user in users]
-
-        # 2. Получаем все товары этих пользователей
-        all_product_ids = []
-        for user_id in user_ids:
-            products = await self.product_repo.get_by_user(user_id)
-            all_product_ids.extend([p.id for p in products])
-
-        if not all_product_ids:
-            logger.debug(f"Нет товаров у пользователей с планом {plan_key}")
-            return 0
-
-        # 3. Удаляем историю старше N дней для этих товаров
-        cutoff_date = datetime.now() - timedelta(days=retention_days)
-
-        deleted = await self.price_history_repo.delete_older_than(
-            all_product_ids,
-            cutoff_date
-        )
-
-        return deleted
-
     async def cleanup_old_data(self, days: int = 365) -> int:
         """
         Глобальная очистка ВСЕЙ истории старше N дней.
@@ -156,16 +95,7 @@ class CleanupService:
         """
         logger.info("Поиск и удаление осиротевших записей истории")
 
-        result = await self.price_history_repo.db.execute(
-            """DELETE FROM price_history
-               WHERE product_id NOT IN (SELECT id FROM products)"""
-        )
-
-        deleted = (
-            int(result.split()[-1])
-            if result != "DELETE 0"
-            else 0
-        )
+        deleted = await self.price_history_repo.delete_orphaned()
 
         if deleted > 0:
             logger.info(f"Удалено {deleted} осиротевших записей истории")
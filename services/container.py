@@ -1,7 +1,7 @@
 """
 Контейнер зависимостей (Dependency Injection Container).
 """
-from typing import Optional
+from functools import cached_property
 
 from infrastructure.db import DB
 from services.price_fetcher import PriceFetcher
@@ -15,6 +15,7 @@ from services.product_analytics_service import ProductAnalyticsService
 from services.product_manager_service import ProductManagerService
 from services.price_history_service import PriceHistoryService
 from services.settings_service import SettingsService
+from services.cleanup_service import CleanupService
 
 
 class Container:
@@ -24,77 +25,51 @@ class Container:
         self.db = db
         self.price_fetcher = price_fetcher
 
-        # Репозитории
-        self._user_repo: Optional[UserRepository] = None
-        self._product_repo: Optional[ProductRepository] = None
-        self._price_history_repo: Optional[PriceHistoryRepository] = None
-
-        # Бизнес-сервисы
-        self._user_service: Optional[UserService] = None
-        self._settings_service: Optional[SettingsService] = None
-        self._product_manager_service: Optional[ProductManagerService] = None
-        self._price_history_service: Optional[PriceHistoryService] = None
-        self._product_analytics_service: Optional[ProductAnalyticsService] = None
-
-    # ===== Репозитории =====
-
-    def get_user_repo(self) -> UserRepository:
-        if self._user_repo is None:
-            self._user_repo = UserRepository(self.db)
-        return self._user_repo
-
-    def get_product_repo(self) -> ProductRepository:
-        if self._product_repo is None:
-            self._product_repo = ProductRepository(self.db)
-        return self._product_repo
-
-    def get_price_history_repo(self) -> PriceHistoryRepository:
-        if self._price_history_repo is None:
-            self._price_history_repo = PriceHistoryRepository(self.db)
-        return self._price_history_repo
+        # Репозитории - дешёвые и нужны всегда, создаём сразу
+        self.user_repo = UserRepository(db)
+        self.product_repo = ProductRepository(db)
+        self.price_history_repo = PriceHistoryRepository(db)
 
     # ===== Бизнес-сервисы =====
-
-    def get_user_service(self) -> UserService:
-        """Получить сервис пользователей."""
-        if self._user_service is None:
-            self._user_service = UserService(
-                self.get_user_repo(),
-                self.get_product_repo()
-            )
-        return self._user_service
-
-    def get_settings_service(self) -> SettingsService:
-        """Получить сервис настроек."""
-        if self._settings_service is None:
-            self._settings_service = SettingsService(
-                self.get_user_repo()
-            )
-        return self._settings_service
-
-    def get_product_manager_service(self) -> ProductManagerService:
-        """Получить сервис управления товарами."""
-        if self._product_manager_service is None:
-            self._product_manager_service = ProductManagerService(
-                self.get_product_repo(),
-                self.get_price_history_repo(),
-                self.price_fetcher
-            )
-        return self._product_manager_service
-
-    def get_price_history_service(self) -> PriceHistoryService:
-        """Получить сервис истории цен."""
-        if self._price_history_service is None:
-            self._price_history_service = PriceHistoryService(
-                self.get_price_history_repo()
-            )
-        return self._price_history_service
-
-    def get_product_analytics_service(self) -> ProductAnalyticsService:
-        """Получить сервис аналитики товаров."""
-        if self._product_analytics_service is None:
-            self._product_analytics_service = ProductAnalyticsService(
-                self.get_product_repo(),
-                self.get_price_history_service()
-            )
-        return self._product_analytics_service
+    # Создаются при первом обращении и дальше читаются из __dict__
+
+    @cached_property
+    def user_service(self) -> UserService:
+        """Сервис пользователей."""
+        return UserService(self.user_repo, self.product_repo)
+
+    @cached_property
+    def settings_service(self) -> SettingsService:
+        """Сервис настроек."""
+        return SettingsService(self.user_repo)
+
+    @cached_property
+    def product_manager_service(self) -> ProductManagerService:
+        """Сервис управления товарами."""
+        return ProductManagerService(
+            self.product_repo,
+            self.price_history_repo,
+            self.price_fetcher
+        )
+
+    @cached_property
+    def price_history_service(self) -> PriceHistoryService:
+        """Сервис истории цен."""
+        return PriceHistoryService(self.price_history_repo)
+
+    @cached_property
+    def product_analytics_service(self) -> ProductAnalyticsService:
+        """Сервис аналитики товаров."""
+        return ProductAnalyticsService(
+            self.product_repo,
+            self.price_history_service
+        )
+
+    @cached_property
+    def cleanup_service(self) -> CleanupService:
+        """Сервис очистки данных."""
+        return CleanupService(
+            self.user_repo,
+            self.product_repo,
+            self.price_history_repo
+        )
@@ -4,18 +4,60 @@
 """
 import asyncio
 import logging
-from typing import Dict, Optional
+from typing import (
+    Any, AsyncIterable, AsyncIterator, Coroutine, Dict, Iterable, Optional
+)
 from aiogram import Bot
-from aiogram import exceptions
 
 from infrastructure.models import ProductRow
 from services.container import Container
+from services.notification_sender import NotificationSender
 from constants import DEFAULT_DEST
+from config import settings
 from utils.cache import product_cache
 from utils.wb_utils import apply_wallet_discount
 
 logger = logging.getLogger(__name__)
 
+# Имена «размеров» у товаров без размеров
+_NO_SIZE_NAMES = frozenset(("", "0", None))
+
+# Шаблоны уведомлений (заполняются через str.format_map)
+_PRICE_DROP_HEADER = (
+    "🔔 <b>Цена снизилась!</b>\n\n"
+    "📦 {name}\n"
+    "🔗 <a href='{url}'>Открыть товар</a>\n\n"
+)
+_PRICE_DROP_WALLET_TMPL = _PRICE_DROP_HEADER + (
+    "💳 <b>Цена с WB кошельком ({discount}%):</b>\n"
+    "✅ <b>Сейчас:</b> {new} ₽\n"
+    "📉 <b>Было:</b> {old} ₽\n"
+    "💰 <b>Экономия:</b> {diff} ₽ ({percent:.1f}%)\n\n"
+    "<i>Без кошелька: {new_raw} ₽ (было {old_raw} ₽)</i>\n"
+)
+_PRICE_DROP_PLAIN_TMPL = _PRICE_DROP_HEADER + (
+    "💰 <b>Новая цена:</b> {new} ₽\n"
+    "📉 <b>Было:</b> {old} ₽\n"
+    "✅ <b>Экономия:</b> {diff} ₽ ({percent:.1f}%)\n"
+)
+_STOCK_OUT_TMPL = (
+    "\n⚠️ <b>Товар закончился!</b>\n\n"
+    "📦 {name}\n"
+    "🔗 <a href='{url}'>Открыть товар</a>\n"
+)
+_STOCK_IN_TMPL = (
+    "\n✅ <b>Товар снова в наличии!</b>\n\n"
+    "📦 {name}\n"
+    "🔗 <a href='{url}'>Открыть товар</a>\n"
+)
+_STOCK_IN_QTY_TMPL = _STOCK_IN_TMPL + "📦 <b>Остаток:</b> {qty} шт.\n"
+
+
+async def _aiter(items: Iterable[ProductRow]) -> AsyncIterator[ProductRow]:
+    """Обернуть обычную коллекцию в асинхронный итератор."""
+    for item in items:
+        yield item
+
 
 class MonitorService:
     """
@@ -27,18 +69,122 @@ class MonitorService:
     - Формирование и отправку уведомлений
     """
     
-    def __init__(self, container: Container, bot: Bot):
+    # Подстройка размера пакета и задержки между пакетами
+    BATCH_SIZE_MIN = 10
+    BATCH_SIZE_MAX = 200
+    BATCH_DELAY_MIN = 0.2      # Минимальная ненулевая пауза
+    BATCH_DELAY_MAX = 10.0
+    TARGET_LATENCY = 2.0       # Желаемое время обработки товара (сек)
+    TARGET_ERROR_RATE = 0.05   # Доля ошибок, выше которой замедляемся
+    EMA_ALPHA = 0.3
+
+    # Сколько накопленных записей цен сбрасывать в БД одним COPY
+    WRITE_FLUSH_SIZE = 500
+
+    # Максимальная длина сообщения Telegram
+    MESSAGE_MAX_LENGTH = 4096
+    
+    def __init__(
+        self,
+        container: Container,
+        bot: Bot,
+        notifier: NotificationSender
+    ):
         self.container = container
         self.bot = bot
-        self.product_repo = container.get_product_repo()
-        self.price_history_repo = container.get_price_history_repo()
-        self.user_repo = container.get_user_repo()
+        self.notifier = notifier
+        self.product_repo = container.product_repo
+        self.price_history_repo = container.price_history_repo
+        self.user_repo = container.user_repo
         self.price_fetcher = container.price_fetcher
+
+        # Состояние регулятора пакетов (живёт между циклами)
+        self.batch_size = 50
+        self.batch_delay = 0.0
+        self._ema_latency: Optional[float] = None
+        self._ema_error_rate = 0.0
+
+        # Запросы к WB за цикл по (nm_id, dest) - см. _fetch_product_data
+        self._fetch_cache: Optional[Dict[tuple, asyncio.Task]] = None
+
+        # Буфер записей цен на время process_batch (см. _save_product_data)
+        self._write_buffer: Optional[list[tuple]] = None
+
+        # Уведомления по пользователям на время process_batch
+        # (см. _flush_notifications)
+        self._notification_buffer: Optional[Dict[int, list[str]]] = None
+
+        # Флаг мягкой остановки (см. request_stop)
+        self._stop_event = asyncio.Event()
+
+        # Фоновые задачи цикла (алерты, отчёты) - см. spawn
+        self._background_tasks: set[asyncio.Task] = set()
+
+    def spawn(self, coro: Coroutine[Any, Any, Any], name: str) -> None:
+        """
+        Запустить служебную корутину в фоне, не задерживая цикл.
+
+        Задача с тем же именем, которая ещё не завершилась, не дублируется.
+        Ошибки логируются, ссылки на задачи держатся до их завершения.
+        """
+        if any(t.get_name() == name for t in self._background_tasks):
+            logger.debug("Фоновая задача %s ещё выполняется, пропускаю", name)
+            coro.close()
+            return
+
+        task = asyncio.create_task(coro, name=name)
+        self._background_tasks.add(task)
+        task.add_done_callback(self._on_background_done)
+
+    def _on_background_done(self, task: asyncio.Task) -> None:
+        """Убрать завершённую фоновую задачу и залогировать её ошибку."""
+        self._background_tasks.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            logger.error(
+                "Ошибка в фоновой задаче %s: %s",
+                task.get_name(),
+                task.exception()
+            )
+
+    async def wait_background_tasks(self) -> None:
+        """Дождаться фоновых задач (при остановке)."""
+        if self._background_tasks:
+            await asyncio.gather(
+                *self._background_tasks, return_exceptions=True
+            )
+
+    def request_stop(self) -> None:
+        """
+        Попросить мониторинг остановиться.
+
+        Новые товары больше не берутся в работу, уже начатые
+        дообрабатываются, monitor_loop выходит после текущего цикла.
+        """
+        self._stop_event.set()
+
+    @property
+    def stop_requested(self) -> bool:
+        """Была ли запрошена остановка."""
+        return self._stop_event.is_set()
+
+    async def wait_stop(self, timeout: float) -> bool:
+        """
+        Подождать timeout секунд или до запроса остановки.
+
+        Returns:
+            True, если запрошена остановка
+        """
+        try:
+            await asyncio.wait_for(self._stop_event.wait(), timeout)
+        except asyncio.TimeoutError:
+            return False
+        return True
     
     async def process_product(
         self,
         product: ProductRow,
-        metrics: Dict[str, int]
+        metrics: Dict[str, int],
+        user: Optional[Dict]
     ) -> None:
         """
         Обработать один товар: получить новые данные, проверить изменения,
@@ -47,17 +193,13 @@ class MonitorService:
         Args:
             product: Товар для обработки
             metrics: Словарь с метриками (processed, errors, notifications)
+            user: Настройки владельца (см. UserRepository.get_monitor_settings)
         """
         try:
-            # Получаем пользователя для dest
-            user = await self.user_repo.get_by_id(product.user_id)
             dest = user.get("dest", DEFAULT_DEST) if user else DEFAULT_DEST
             
             # Получаем данные о товаре
-            new_data = await self.price_fetcher.get_product_data(
-                product.nm_id,
-                dest=dest
-            )
+            new_data = await self._fetch_product_data(product.nm_id, dest)
             
             if not new_data:
                 metrics["errors"] += 1
@@ -87,18 +229,8 @@ class MonitorService:
                 user
             )
             
-            # Сохраняем новые данные
-            await self._save_product_data(product.id, price_data)
-            
-            # Добавляем в историю при изменении цены
-            if (product.last_product_price is None or 
-                price_data['product_price'] != product.last_product_price):
-                await self.price_history_repo.add(
-                    product.id,
-                    price_data['basic_price'],
-                    price_data['product_price'],
-                    price_data['qty']
-                )
+            # Сохраняем новые данные (вместе с историей цен)
+            await self._save_product_data(product, price_data)
             
             metrics["processed"] += 1
             
@@ -118,6 +250,27 @@ class MonitorService:
             )
             metrics["errors"] += 1
     
+    async def _fetch_product_data(self, nm_id: int, dest: int) -> Optional[Dict]:
+        """
+        Получить данные товара с WB.
+
+        Во время process_batch одинаковые (nm_id, dest) запрашиваются
+        один раз за цикл: остальные подписчики ждут тот же запрос.
+        """
+        if self._fetch_cache is None:
+            return await self.price_fetcher.get_product_data(nm_id, dest=dest)
+
+        key = (nm_id, dest)
+        task = self._fetch_cache.get(key)
+        if task is None:
+            task = asyncio.create_task(
+                self.price_fetcher.get_product_data(nm_id, dest=dest)
+            )
+            self._fetch_cache[key] = task
+
+        # shield - отмена одного подписчика не должна отменять запрос другим
+        return await asyncio.shield(task)
+
     def _extract_price_data(
         self,
         product: ProductRow,
@@ -131,12 +284,12 @@ class MonitorService:
             или None при ошибке
         """
         sizes = new_data.get("sizes", [])
+        # Размеры по имени за один проход (reversed - при повторе
+        # имени побеждает первый размер, как раньше)
+        sizes_by_name = {s.get("name"): s for s in reversed(sizes)}
         
         # Проверяем наличие реальных размеров
-        has_real_sizes = any(
-            s.get("name") not in ("", "0", None)
-            for s in sizes
-        )
+        has_real_sizes = not sizes_by_name.keys() <= _NO_SIZE_NAMES
         
         # Товар с размерами
         if has_real_sizes:
@@ -148,10 +301,7 @@ class MonitorService:
                 return None
             
             # Находим выбранный размер
-            size_data = next(
-                (s for s in sizes if s.get("name") == selected_size),
-                None
-            )
+            size_data = sizes_by_name.get(selected_size)
             
             if not size_data:
                 logger.warning(
@@ -161,13 +311,11 @@ class MonitorService:
                 return None
             
             price_info = size_data.get("price", {})
-            stocks = size_data.get("stocks", [])
         
         # Товар без размеров
         else:
             size_data = sizes[0] if sizes else {}
             price_info = size_data.get("price", new_data.get("price", {}))
-            stocks = size_data.get("stocks", new_data.get("stocks", []))
             
             if not price_info:
                 logger.warning(
@@ -179,7 +327,8 @@ class MonitorService:
         # Формируем результат
         basic_price = price_info.get("basic", 0)
         product_price = price_info.get("product", 0)
-        qty = sum(stock.get("qty", 0) for stock in stocks)
+        # Остатки размера уже просуммированы в PriceFetcher
+        qty = size_data.get("qty", 0)
         
         return {
             "basic_price": basic_price,
@@ -226,8 +375,11 @@ class MonitorService:
         # Проверка снижения цены
         if old_price is not None and new_price < old_price:
             if product.notify_mode == "percent":
-                percent_drop = ((old_price - new_price) / old_price) * 100
-                notifications["price_drop"] = percent_drop >= product.notify_value
+                # (old - new) / old * 100 >= value - в целых числах, без деления
+                notifications["price_drop"] = (
+                    (old_price - new_price) * 100
+                    >= product.notify_value * old_price
+                )
             
             elif product.notify_mode == "threshold":
                 notifications["price_drop"] = new_price <= product.notify_value
@@ -252,47 +404,133 @@ class MonitorService:
     
     async def _save_product_data(
         self,
-        product_id: int,
+        product: ProductRow,
         price_data: Dict
     ) -> None:
-        """Сохранить новые данные о товаре."""
-        
-        # ✅ ДОБАВИТЬ: Не сохраняем нулевую цену если товара нет
-        if price_data['out_of_stock']:
-            # Получаем текущий товар
-            product = await self.product_repo.get_by_id(product_id)
-            
-            # Сохраняем старую цену или оставляем как есть
-            if product and product.get('last_product_price'):
-                price_data['product_price'] = product['last_product_price']
-                price_data['basic_price'] = product.get('last_basic_price', price_data['basic_price'])
+        """
+        Сохранить новые данные о товаре и точку истории цен
+        (одним запросом к БД).
+
+        Строку товара переписываем, только если данные изменились -
+        иначе лишь назначаем следующую проверку.
+        """
+        # Не сохраняем нулевую цену если товара нет - оставляем прежнюю
+        if price_data['out_of_stock'] and product.last_product_price:
+            price_data['product_price'] = product.last_product_price
+            if product.last_basic_price is not None:
+                price_data['basic_price'] = product.last_basic_price
+        
+        # В историю - только если товар в наличии и цена изменилась
+        save_history = (
+            not price_data['out_of_stock'] and
+            price_data['product_price'] != product.last_product_price
+        )
+        changed = (
+            price_data['basic_price'] != product.last_basic_price or
+            price_data['product_price'] != product.last_product_price or
+            price_data['qty'] != product.last_qty or
+            price_data['out_of_stock'] != product.out_of_stock
+        )
         
-        await self.product_repo.update_prices_and_stock(
-            product_id,
+        record = (
+            product.id,
             price_data['basic_price'],
             price_data['product_price'],
             price_data['qty'],
-            price_data['out_of_stock']
+            price_data['out_of_stock'],
+            changed,
+            save_history,
+            self._next_check_interval(product, changed)
         )
-        
-        # ✅ ИЗМЕНИТЬ: Не добавляем в историю если товара нет и цена не изменилась
-        product = await self.product_repo.get_by_id(product_id)
-        if product:
-            should_save_history = (
-                not price_data['out_of_stock'] and  # Товар в наличии
-                (product.get('last_product_price') is None or 
-                price_data['product_price'] != product['last_product_price'])
+
+        # В пакетной обработке запись уходит в БД вместе с остальными
+        if self._write_buffer is not None:
+            self._write_buffer.append(record)
+            return
+
+        await self.product_repo.update_prices_with_history(*record)
+        if changed:
+            product_cache.remove(f"get_product_detail:{product.id}")
+
+    @staticmethod
+    def _next_check_interval(product: ProductRow, changed: bool) -> int:
+        """
+        Через сколько секунд проверить товар снова.
+
+        Изменившиеся товары проверяем каждый цикл, у неизменных
+        интервал удваивается до POLL_BACKOFF_MAX_SECONDS.
+        """
+        base = settings.POLL_INTERVAL_SECONDS
+        if changed or product.check_interval is None:
+            return base
+        return min(
+            product.check_interval * 2,
+            max(base, settings.POLL_BACKOFF_MAX_SECONDS)
+        )
+
+    async def _flush_writes(self) -> bool:
+        """
+        Сбросить накопленные записи цен в БД одной пачкой.
+
+        Если пачка не записалась, пишем записи по одной; не записанные и
+        так остаются в буфере до следующего сброса - иначе следующий цикл
+        увидит старые цены и повторит уже отправленные уведомления.
+
+        Returns:
+            True, если в БД записано всё, что было в буфере к началу сброса
+        """
+        if not self._write_buffer:
+            return True
+
+        records, self._write_buffer = self._write_buffer, []
+        try:
+            await self.product_repo.bulk_update_prices(records)
+            saved = records
+        except Exception as e:
+            logger.exception(
+                "Не удалось сохранить %d записей цен пачкой, пишу по одной: %s",
+                len(records), e
             )
-            
-            if should_save_history:
-                await self.price_history_repo.add(
-                    product_id,
-                    price_data['basic_price'],
-                    price_data['product_price'],
-                    price_data['qty']
+            saved, failed = [], []
+            for record in records:
+                try:
+                    await self.product_repo.update_prices_with_history(*record)
+                    saved.append(record)
+                except Exception:
+                    failed.append(record)
+            if failed:
+                logger.error(
+                    "❌ Не сохранено записей цен: %d", len(failed)
                 )
-            
-            product_cache.remove(f"get_product_detail:{product_id}")
+                self._write_buffer[:0] = failed
+
+        for record in saved:
+            if record[5]:  # changed
+                product_cache.remove(f"get_product_detail:{record[0]}")
+        return len(saved) == len(records)
+
+    async def _flush_saved(self) -> bool:
+        """
+        Сбросить записи цен, а после записи - уведомления по ним.
+
+        Товар попадает в буфер записей раньше, чем его уведомление в буфер
+        уведомлений, так что накопленные к началу сброса уведомления
+        относятся к сбрасываемым записям. Если запись не удалась, они ждут
+        следующего сброса вместе со своими записями.
+
+        Returns:
+            True, если записи сохранены и уведомления отправлены
+        """
+        ready, self._notification_buffer = self._notification_buffer, {}
+        saved = await self._flush_writes()
+
+        # Уведомления, накопленные во время записи, ждут своей очереди
+        later, self._notification_buffer = self._notification_buffer, ready
+        if saved:
+            self._flush_notifications()
+        for user_id, messages in later.items():
+            self._notification_buffer.setdefault(user_id, []).extend(messages)
+        return saved
 
     async def _send_notifications(
         self,
@@ -302,29 +540,64 @@ class MonitorService:
         user: Optional[Dict]
     ) -> None:
         """Сформировать и отправить уведомления."""
-        message = ""
+        parts = []
         
         # Уведомление о снижении цены
         if notifications["price_drop"]:
-            message += self._format_price_drop_message(
-                product,
-                price_data,
-                user
+            parts.append(
+                self._format_price_drop_message(product, price_data, user)
             )
         
         # Уведомление о наличии
         if notifications["stock_out"]:
-            message += self._format_stock_out_message(product)
+            parts.append(self._format_stock_out_message(product))
         
         if notifications["stock_in"]:
-            message += self._format_stock_in_message(
-                product,
-                price_data,
-                user
+            parts.append(
+                self._format_stock_in_message(product, price_data, user)
             )
         
-        if message:
-            await self._send_telegram_message(product.user_id, message)
+        message = "".join(parts)
+        if not message:
+            return
+
+        # В пакетной обработке копим уведомления пользователя, чтобы
+        # отправить их одним сообщением
+        if self._notification_buffer is not None:
+            self._notification_buffer.setdefault(
+                product.user_id, []
+            ).append(message)
+            return
+
+        self._enqueue_notification(product.user_id, message)
+
+    def _enqueue_notification(self, user_id: int, message: str) -> None:
+        """Передать сообщение NotificationSender (Telegram не ждём)."""
+        self.notifier.enqueue(
+            user_id,
+            message,
+            parse_mode="HTML",
+            disable_web_page_preview=True
+        )
+
+    def _flush_notifications(self) -> None:
+        """
+        Отправить накопленные уведомления: по одному сообщению на
+        пользователя (длинные - частями до MESSAGE_MAX_LENGTH).
+        """
+        if not self._notification_buffer:
+            return
+
+        pending, self._notification_buffer = self._notification_buffer, {}
+        for user_id, messages in pending.items():
+            text = messages[0]
+            for message in messages[1:]:
+                if len(text) + 2 + len(message) > self.MESSAGE_MAX_LENGTH:
+                    self._enqueue_notification(user_id, text)
+                    text = message
+                else:
+                    text += "\n\n" + message
+            self._enqueue_notification(user_id, text)
     
     def _format_price_drop_message(
         self,
@@ -349,36 +622,27 @@ class MonitorService:
         diff = old_display - new_display
         diff_percent = (diff / old_display * 100) if old_display > 0 else 0
         
-        message = (
-            f"🔔 <b>Цена снизилась!</b>\n\n"
-            f"📦 {product.display_name}\n"
-            f"🔗 <a href='{product.url_product}'>Открыть товар</a>\n\n"
+        template = (
+            _PRICE_DROP_WALLET_TMPL if discount > 0 else _PRICE_DROP_PLAIN_TMPL
         )
-        
-        if discount > 0:
-            message += (
-                f"💳 <b>Цена с WB кошельком ({discount}%):</b>\n"
-                f"✅ <b>Сейчас:</b> {new_display} ₽\n"
-                f"📉 <b>Было:</b> {old_display} ₽\n"
-                f"💰 <b>Экономия:</b> {diff} ₽ ({diff_percent:.1f}%)\n\n"
-                f"<i>Без кошелька: {new_price} ₽ (было {old_price} ₽)</i>\n"
-            )
-        else:
-            message += (
-                f"💰 <b>Новая цена:</b> {new_display} ₽\n"
-                f"📉 <b>Было:</b> {old_display} ₽\n"
-                f"✅ <b>Экономия:</b> {diff} ₽ ({diff_percent:.1f}%)\n"
-            )
-        
-        return message
+        return template.format_map({
+            "name": product.display_name,
+            "url": product.url_product,
+            "discount": discount,
+            "new": new_display,
+            "old": old_display,
+            "diff": diff,
+            "percent": diff_percent,
+            "new_raw": new_price,
+            "old_raw": old_price,
+        })
     
     def _format_stock_out_message(self, product: ProductRow) -> str:
         """Форматировать сообщение о том что товар закончился."""
-        return (
-            f"\n⚠️ <b>Товар закончился!</b>\n\n"
-            f"📦 {product.display_name}\n"
-            f"🔗 <a href='{product.url_product}'>Открыть товар</a>\n"
-        )
+        return _STOCK_OUT_TMPL.format_map({
+            "name": product.display_name,
+            "url": product.url_product,
+        })
     
     def _format_stock_in_message(
         self,
@@ -390,77 +654,212 @@ class MonitorService:
         user_plan = user.get("plan", "plan_free") if user else "plan_free"
         qty = price_data['qty']
         
-        message = (
-            f"\n✅ <b>Товар снова в наличии!</b>\n\n"
-            f"📦 {product.display_name}\n"
-            f"🔗 <a href='{product.url_product}'>Открыть товар</a>\n"
-        )
-        
         # Показываем количество только для Pro
-        if user_plan == "plan_pro" and qty:
-            message += f"📦 <b>Остаток:</b> {qty} шт.\n"
-        
-        return message
-    
-    async def _send_telegram_message(
-        self,
-        user_id: int,
-        message: str
-    ) -> None:
-        """Отправить сообщение в Telegram с обработкой ошибок."""
-        try:
-            await self.bot.send_message(
-                user_id,
-                message,
-                parse_mode="HTML",
-                disable_web_page_preview=True
-            )
-            logger.info(f"Отправлено уведомление пользователю {user_id}")
-            
-        except exceptions.TelegramForbiddenError:
-            logger.warning(f"Пользователь {user_id} заблокировал бота")
-            
-        except exceptions.TelegramBadRequest as e:
-            logger.warning(
-                f"Ошибка отправки пользователю {user_id}: {e}"
-            )
-            
-        except Exception as e:
-            logger.exception(
-                f"Неожиданная ошибка при отправке уведомления: {e}"
-            )
+        template = (
+            _STOCK_IN_QTY_TMPL if user_plan == "plan_pro" and qty
+            else _STOCK_IN_TMPL
+        )
+        return template.format_map({
+            "name": product.display_name,
+            "url": product.url_product,
+            "qty": qty,
+        })
     
     async def process_batch(
         self,
-        products: list[ProductRow],
-        batch_size: int = 50,
-        delay_between_batches: float = 1.0
+        products: Iterable[ProductRow] | AsyncIterable[ProductRow],
+        batch_size: Optional[int] = None,
+        delay_between_batches: Optional[float] = None
     ) -> Dict[str, int]:
         """
-        Обработать список товаров пакетами.
+        Обработать товары пулом воркеров.
+
+        batch_size воркеров разбирают товары из ограниченной очереди, так что
+        в работе всегда не более batch_size товаров и новый товар стартует,
+        как только освободился воркер. Чтение товаров притормаживается
+        очередью. По итогам вызова размер пакета и задержка подстраиваются
+        (см. _tune_batching).
         
         Args:
-            products: Список товаров
-            batch_size: Размер пакета
-            delay_between_batches: Задержка между пакетами (секунды)
+            products: Список товаров или асинхронный итератор (курсор БД)
+            batch_size: Число воркеров / размер пакета
+                (по умолчанию - подобранный)
+            delay_between_batches: Пауза после каждых batch_size товаров, сек
+                (по умолчанию - подобранная; 0 - без пауз)
         
         Returns:
             Dict с метриками: processed, errors, notifications
         """
+        if batch_size is None:
+            batch_size = self.batch_size
+        if delay_between_batches is None:
+            delay_between_batches = self.batch_delay
+
         metrics = {"processed": 0, "errors": 0, "notifications": 0}
+        queue: asyncio.Queue[ProductRow] = asyncio.Queue(maxsize=batch_size)
+        dispatched = 0
+        loop = asyncio.get_running_loop()
+        total_latency = 0.0
+
+        # Настройки владельцев товаров, накопленные за цикл
+        users: Dict[int, Optional[dict]] = {}
+
+        async def worker() -> None:
+            nonlocal total_latency
+            while True:
+                product = await queue.get()
+                started = loop.time()
+                try:
+                    await self.process_product(
+                        product, metrics, users.get(product.user_id)
+                    )
+                finally:
+                    total_latency += loop.time() - started
+                    queue.task_done()
+
+        async def dispatch(chunk: list[ProductRow]) -> bool:
+            """Поставить пачку товаров в очередь. False - если остановка."""
+            nonlocal dispatched
+
+            # Недостающих пользователей пачки загружаем одним запросом
+            # (ненайденных запоминаем как None, чтобы не спрашивать снова)
+            missing = {p.user_id for p in chunk}.difference(users)
+            if missing:
+                found = await self.user_repo.get_monitor_settings(list(missing))
+                users.update(dict.fromkeys(missing))
+                users.update(found)
+
+            # Записи цен сбрасываем по мере накопления, уведомления по
+            # ним - сразу после записи
+            if len(self._write_buffer) >= self.WRITE_FLUSH_SIZE:
+                await self._flush_saved()
+
+            for p in chunk:
+                # После request_stop новые товары не берём
+                if self.stop_requested:
+                    return False
+
+                # Пауза между пакетами (кроме первого) - только когда
+                # регулятор её включил из-за ошибок WB
+                if (
+                    delay_between_batches
+                    and dispatched
+                    and dispatched % batch_size == 0
+                ):
+                    await asyncio.sleep(delay_between_batches)
+
+                await queue.put(p)
+                dispatched += 1
+            return True
+
+        if not isinstance(products, AsyncIterable):
+            products = _aiter(products)
+
+        workers = [
+            asyncio.create_task(worker(), name=f"monitor_worker_{i}")
+            for i in range(batch_size)
+        ]
+        self._write_buffer = []
+        self._notification_buffer = {}
+        self._fetch_cache = {}
         
-        for i in range(0, len(products), batch_size):
-            batch = products[i:i + batch_size]
-            
-            tasks = [
-                asyncio.create_task(self.process_product(p, metrics))
-                for p in batch
-            ]
-            
-            await asyncio.gather(*tasks, return_exceptions=True)
+        try:
+            chunk: list[ProductRow] = []
+            async for p in products:
+                chunk.append(p)
+                if len(chunk) >= batch_size:
+                    if not await dispatch(chunk):
+                        break
+                    chunk = []
+            else:
+                if chunk:
+                    await dispatch(chunk)
             
-            # Задержка между пакетами (кроме последнего)
-            if i + batch_size < len(products):
-                await asyncio.sleep(delay_between_batches)
+            # Дожидаемся, пока воркеры разберут очередь
+            await queue.join()
+
+        finally:
+            # Курсор закрываем сразу, а не при сборке мусора
+            aclose = getattr(products, "aclose", None)
+            if aclose is not None:
+                await aclose()
+
+            # Воркеры (и при отмене - недообработанные товары) гасим
+            for task in workers:
+                task.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+
+            # Запросы к WB, которые уже никто не ждёт
+            for task in self._fetch_cache.values():
+                task.cancel()
+            self._fetch_cache = None
+
+            # Дописываем то, что успели обработать, и только после записи
+            # отправляем уведомления: товары, не попавшие в БД, следующий
+            # цикл обработает (и уведомит) заново
+            if not await self._flush_saved() and self._notification_buffer:
+                logger.warning(
+                    "⚠️ Уведомления %d пользователей отложены до следующего "
+                    "цикла: цены не сохранены",
+                    len(self._notification_buffer)
+                )
+            self._notification_buffer = None
+            self._write_buffer = None
+
+        if dispatched:
+            self._tune_batching(
+                total_latency / dispatched,
+                metrics["errors"] / dispatched
+            )
         
         return metrics
+
+    def _tune_batching(self, latency: float, error_rate: float) -> None:
+        """
+        Подстроить batch_size и batch_delay по итогам цикла.
+
+        Размер пакета растёт, пока товар обрабатывается быстрее
+        TARGET_LATENCY, и уменьшается, когда WB начинает отвечать медленнее.
+        Пауза между пакетами - запасной тормоз: в норме её нет (одновременные
+        запросы к WB и так ограничены семафором PriceFetcher), при доле
+        ошибок выше TARGET_ERROR_RATE она включается и удваивается, когда
+        ошибок становится мало - уменьшается вдвое и выключается.
+        За один цикл размер пакета меняется не более чем вдвое.
+
+        Args:
+            latency: Среднее время обработки товара в цикле (сек)
+            error_rate: Доля товаров с ошибкой в цикле
+        """
+        alpha = self.EMA_ALPHA
+        if self._ema_latency is None:
+            self._ema_latency = latency
+        else:
+            self._ema_latency = alpha * latency + (1 - alpha) * self._ema_latency
+        self._ema_error_rate = (
+            alpha * error_rate + (1 - alpha) * self._ema_error_rate
+        )
+
+        if self._ema_latency > 0:
+            ratio = min(max(self.TARGET_LATENCY / self._ema_latency, 0.5), 2.0)
+            self.batch_size = int(min(
+                max(self.batch_size * ratio, self.BATCH_SIZE_MIN),
+                self.BATCH_SIZE_MAX
+            ))
+
+        if self._ema_error_rate > self.TARGET_ERROR_RATE:
+            self.batch_delay = min(
+                max(self.batch_delay * 2, self.BATCH_DELAY_MIN),
+                self.BATCH_DELAY_MAX
+            )
+        elif self.batch_delay / 2 >= self.BATCH_DELAY_MIN:
+            self.batch_delay /= 2
+        else:
+            self.batch_delay = 0.0
+
+        logger.debug(
+            "Пакеты: размер=%d, задержка=%.2fs (latency=%.2fs, ошибок=%.1f%%)",
+            self.batch_size,
+            self.batch_delay,
+            self._ema_latency,
+            self._ema_error_rate * 100,
+        )
@@ -0,0 +1,193 @@
+"""
+Очередь исходящих сообщений Telegram.
+
+Мониторинг и фоновые задачи не ждут Telegram: сообщения кладутся в
+ограниченную очередь, а отправляют их отдельные воркеры. Все исходящие
+сообщения идут через tg_send, который держит лимиты Telegram:
+30 сообщений в секунду всего и 1 в секунду в один чат.
+Лимиты считаются внутри процесса - см. set_global_rate.
+"""
+import asyncio
+import logging
+from typing import Any, Dict
+
+from aiogram import Bot
+from aiogram import exceptions
+from aiogram.types import Message
+
+from utils.rate_limiter import TokenBucket
+
+logger = logging.getLogger(__name__)
+
+GLOBAL_RATE = 30
+PER_CHAT_RATE = 1
+_PER_CHAT_PRUNE_SIZE = 1000
+
+_global_bucket = TokenBucket(GLOBAL_RATE)
+_chat_buckets: Dict[int, TokenBucket] = {}
+
+
+def set_global_rate(rate: float) -> None:
+    """
+    Задать общий лимит отправки этого процесса.
+
+    Бакет живёт в памяти процесса: при мониторинге в отдельном процессе
+    (MONITOR_SEPARATE_PROCESS) каждый процесс получает свою долю
+    GLOBAL_RATE, иначе вместе они превысят лимит Telegram.
+    """
+    global _global_bucket
+    _global_bucket = TokenBucket(rate)
+
+
+def _chat_bucket(chat_id: int) -> TokenBucket:
+    """Бакет чата (неиспользуемые периодически удаляются)."""
+    bucket = _chat_buckets.get(chat_id)
+    if bucket is None:
+        if len(_chat_buckets) >= _PER_CHAT_PRUNE_SIZE:
+            for key in [k for k, b in _chat_buckets.items() if b.idle]:
+                del _chat_buckets[key]
+        bucket = _chat_buckets[chat_id] = TokenBucket(PER_CHAT_RATE)
+    return bucket
+
+
+async def tg_send(bot: Bot, chat_id: int, text: str, **kwargs: Any) -> Message:
+    """
+    bot.send_message с соблюдением лимитов Telegram.
+
+    Сначала ждём лимит чата, потом общий - чтобы ожидание одного
+    чата не расходовало общие токены.
+    """
+    await _chat_bucket(chat_id).acquire()
+    await _global_bucket.acquire()
+    return await bot.send_message(chat_id, text, **kwargs)
+
+
+class NotificationSender:
+    """
+    Фоновая отправка сообщений в Telegram.
+
+    Usage:
+        sender = NotificationSender(bot)
+        asyncio.create_task(sender.run())
+        sender.enqueue(user_id, "Текст", parse_mode="HTML")
+    """
+
+    def __init__(
+        self,
+        bot: Bot,
+        maxsize: int = 5000,
+        workers: int = 5
+    ):
+        """
+        Args:
+            bot: Экземпляр бота
+            maxsize: Максимум сообщений в очереди
+            workers: Сколько сообщений отправляется одновременно
+        """
+        self.bot = bot
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=maxsize)
+        self._workers = workers
+
+    def enqueue(self, chat_id: int, text: str, **kwargs: Any) -> bool:
+        """
+        Поставить сообщение в очередь.
+
+        Args:
+            chat_id: Получатель
+            text: Текст сообщения
+            **kwargs: Параметры bot.send_message (parse_mode и т.п.)
+
+        Returns:
+            False, если очередь переполнена и сообщение отброшено
+        """
+        try:
+            self._queue.put_nowait((chat_id, text, kwargs))
+        except asyncio.QueueFull:
+            logger.warning(
+                "⚠️ Очередь уведомлений переполнена, сообщение для %s отброшено",
+                chat_id
+            )
+            return False
+        return True
+
+    async def run(self) -> None:
+        """Запустить воркеры отправки (работают до отмены)."""
+        workers = [
+            asyncio.create_task(self._worker(), name=f"tg_sender_{i}")
+            for i in range(self._workers)
+        ]
+        try:
+            await asyncio.gather(*workers)
+        finally:
+            for task in workers:
+                task.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+
+            if not self._queue.empty():
+                logger.warning(
+                    "⚠️ Не отправлено уведомлений при остановке: %d",
+                    self._queue.qsize()
+                )
+
+    async def drain(self, timeout: float) -> bool:
+        """
+        Дождаться отправки всего, что уже в очереди.
+
+        Вызывается при остановке перед отменой run(), чтобы не терять
+        поставленные уведомления.
+
+        Args:
+            timeout: Сколько ждать (сек)
+
+        Returns:
+            False, если очередь не опустела за timeout
+        """
+        try:
+            await asyncio.wait_for(self._queue.join(), timeout)
+        except asyncio.TimeoutError:
+            logger.warning(
+                "⚠️ Очередь уведомлений не опустела за %ss, осталось %d",
+                timeout, self._queue.qsize()
+            )
+            return False
+        return True
+
+    async def _worker(self) -> None:
+        """Разбирать очередь и отправлять сообщения."""
+        while True:
+            chat_id, text, kwargs = await self._queue.get()
+            try:
+                await self._send(chat_id, text, kwargs)
+            finally:
+                self._queue.task_done()
+
+    async def _send(
+        self,
+        chat_id: int,
+        text: str,
+        kwargs: Dict[str, Any]
+    ) -> None:
+        """Отправить сообщение с обработкой ошибок."""
+        try:
+            try:
+                await tg_send(self.bot, chat_id, text, **kwargs)
+            except exceptions.TelegramRetryAfter as e:
+                # Telegram попросил подождать - ждём и пробуем ещё раз
+                logger.warning(
+                    "Telegram ограничил отправку, жду %ss", e.retry_after
+                )
+                await asyncio.sleep(e.retry_after)
+                await tg_send(self.bot, chat_id, text, **kwargs)
+
+            logger.info("Отправлено уведомление пользователю %s", chat_id)
+
+        except exceptions.TelegramForbiddenError:
+            logger.warning("Пользователь %s заблокировал бота", chat_id)
+
+        except exceptions.TelegramBadRequest as e:
+            logger.warning("Ошибка отправки пользователю %s: %s", chat_id, e)
+
+        except Exception as e:
+            logger.exception(
+                "Неожиданная ошибка при отправке уведомления: %s", e
+            )
@@ -3,15 +3,27 @@ import logging
 import random
 from typing import Dict, Optional
 import aiohttp
+import orjson
+from config import settings
 from constants import DEFAULT_DEST
 from services.xpow_fetcher import get_xpow_fetcher
 from utils.loggers import challenge_logger
-from utils.cache import cached, product_cache
+from utils.cache import SimpleCache, cached
 from utils.decorators import retry_on_error
 from utils.error_tracker import get_error_tracker, ErrorType
 
 logger = logging.getLogger(__name__)
 
+# Карточки WB: кэш не дольше половины интервала мониторинга, чтобы
+# следующий цикл всегда получал свежие данные
+wb_card_cache = SimpleCache(
+    ttl_seconds=max(1, min(300, settings.POLL_INTERVAL_SECONDS // 2))
+)
+
+# Таймауты запросов к WB: connect отдельно, чтобы зависшее соединение
+# не занимало слот семафора на всё время total
+WB_TIMEOUT = aiohttp.ClientTimeout(total=15, connect=3)
+
 
 class PriceFetchError(Exception):
     """Ошибка при получении данных о товаре."""
@@ -51,9 +63,7 @@ async def get_product_data_async(
 
     for attempt in range(3):
         try:
-            async with session.get(
-                url, headers=headers, timeout=aiohttp.ClientTimeout(total=15)
-            ) as resp:
+            async with session.get(url, headers=headers) as resp:
                 if resp.status != 200:
                     raise PriceFetchError(f"HTTP {resp.status} для nm={nm_id}")
 
@@ -61,7 +71,8 @@ async def get_product_data_async(
                 response_xpow = resp.headers.get("x-pow", "")
                 has_challenge = "challenge=" in response_xpow
 
-                data = await resp.json()
+                # orjson прямо из байтов, без промежуточной строки
+                data = orjson.loads(await resp.read())
                 products = data.get("products", [])
 
                 if not products:
@@ -120,7 +131,18 @@ class PriceFetcher:
 
     async def _get_session(self) -> aiohttp.ClientSession:
         if self._session is None or self._session.closed:
-            self._session = aiohttp.ClientSession()
+            # Одна долгоживущая сессия: keep-alive соединения с WB
+            # переиспользуются, TLS-рукопожатие не на каждый запрос
+            connector = aiohttp.TCPConnector(
+                limit=100,
+                limit_per_host=30,
+                keepalive_timeout=60,
+                ttl_dns_cache=300
+            )
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=WB_TIMEOUT
+            )
         return self._session
 
     async def _get_xpow_fetcher(self):
@@ -134,7 +156,7 @@ class PriceFetcher:
             await self._session.close()
 
     @retry_on_error(max_attempts=3, delay=2, exceptions=(PriceFetchError,))
-    @cached(ttl=300, cache_instance=product_cache)
+    @cached(cache_instance=wb_card_cache)
     async def get_product_data(
         self, nm_id: int, dest: Optional[int] = None
     ) -> Optional[Dict]:
@@ -198,6 +220,12 @@ class PriceFetcher:
                 for s in data.get("sizes", []):
                     price_data = s.get("price", {})
 
+                    # Остатки размера суммируем здесь один раз: результат
+                    # кэшируется и общий для всех подписчиков товара
+                    qty = 0
+                    for stock in s.get("stocks", []):
+                        qty += stock.get("qty") or 0
+
                     size_info = {
                         "name": s.get("name", ""),
                         "origName": s.get("origName", ""),
@@ -205,7 +233,7 @@ class PriceFetcher:
                             "basic": int(price_data.get("basic", 0)) // 100,
                             "product": int(price_data.get("product", 0)) // 100,
                         },
-                        "stocks": [{"qty": stock.get("qty", 0)} for stock in s.get("stocks", [])]
+                        "qty": qty
                     }
                     result["sizes"].append(size_info)
 
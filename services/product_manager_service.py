@@ -150,8 +150,7 @@ class ProductManagerService:
 
         # Извлекаем данные
         price_info = size_data.get("price", {})
-        stocks = size_data.get("stocks", [])
-        qty = sum(stock.get("qty", 0) for stock in stocks)
+        qty = size_data.get("qty", 0)
 
         return {
             "nm_id": nm_id,
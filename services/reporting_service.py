@@ -5,6 +5,7 @@ import logging
 from typing import Dict
 from aiogram import Bot
 from config import settings
+from services.notification_sender import tg_send
 
 logger = logging.getLogger(__name__)
 
@@ -49,8 +50,13 @@ class ReportingService:
             f"⏰ Интервал проверки: {self.poll_interval} сек"
         )
 
+        # Сбрасываем метрики сразу: отчёт может отправляться в фоне,
+        # пока следующий цикл уже копит новые
+        self.reset_metrics()
+
         try:
-            await self.bot.send_message(
+            await tg_send(
+                self.bot,
                 settings.ADMIN_CHAT_ID,
                 report,
                 parse_mode="HTML"
@@ -60,9 +66,6 @@ class ReportingService:
         except Exception as e:
             logger.error(f"Не удалось отправить отчёт админу: {e}")
 
-        # Сбрасываем метрики
-        self.reset_metrics()
-
     def reset_metrics(self):
         """Сбросить накопленные метрики."""
         self.hourly_metrics = {"processed": 0, "errors": 0, "notifications": 0}
@@ -42,10 +42,7 @@ class UserService:
 
     async def get_or_create_user(self, user_id: int) -> UserView:
         """Убедиться что пользователь существует, создать если нет."""
-        user = await self.user_repo.get_by_id(user_id)
-        if not user:
-            user = User(id=user_id)
-            user = await self.user_repo.create(user_id)
+        user = await self.user_repo.create(User(id=user_id))
         return UserView.from_entity(user)
 
     @cached(ttl=600, cache_instance=user_cache)
@@ -93,12 +90,11 @@ class UserService:
         if not user:
             return {"exists": False}
 
-        # Используем методы репозитория для получения данных
-        total_products = await self.product_repo.count_by_user(user_id)
-        out_of_stock = await self.product_repo.count_out_of_stock(user_id)
+        total_products, out_of_stock, avg_price = (
+            await self.product_repo.get_user_stats(user_id)
+        )
         in_stock = total_products - out_of_stock
 
-        avg_price = await self.product_repo.get_average_price(user_id)
         cheapest = await self.product_repo.get_cheapest(user_id)
         most_expensive = await self.product_repo.get_most_expensive(user_id)
 
@@ -354,3 +354,13 @@ async def get_xpow_fetcher() -> XPowFetcher:
             logger.info("🎯 XPowFetcher готов к работе")
     
     return _xpow_fetcher
+
+
+async def close_xpow_fetcher() -> None:
+    """Закрыть глобальный XPowFetcher (браузер), если он создан."""
+    global _xpow_fetcher
+
+    async with _xpow_fetcher_lock:
+        if _xpow_fetcher is not None:
+            await _xpow_fetcher.close()
+            _xpow_fetcher = None
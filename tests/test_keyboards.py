@@ -0,0 +1,61 @@
+"""Регрессия: общие клавиатуры сериализуются как обычные и не изменяются."""
+import asyncio
+import copy
+
+import orjson
+import pytest
+from aiogram import Bot
+from aiogram.client.session.aiohttp import AiohttpSession
+from aiogram.methods import EditMessageReplyMarkup, EditMessageText, SendMessage
+
+from keyboards.kb import KEYBOARDS, product_detail_kb
+
+# product_detail_kb кэшируется lru_cache - её результат тоже общий
+SHARED = [KEYBOARDS["start"], product_detail_kb(123)]
+
+
+def _reply_markup_payload(method) -> dict:
+    """Собрать форму запроса так же, как aiogram при отправке."""
+
+    async def build():
+        bot = Bot("42:TEST")
+        session = AiohttpSession()
+        try:
+            form = session.build_form_data(bot, method)
+        finally:
+            await session.close()
+            await bot.session.close()
+        return next(
+            value for options, _, value in form._fields
+            if options["name"] == "reply_markup"
+        )
+
+    return orjson.loads(asyncio.run(build()))
+
+
+@pytest.mark.parametrize("markup", SHARED)
+@pytest.mark.parametrize("make_method", [
+    lambda kb: EditMessageText(chat_id=1, message_id=1, text="t", reply_markup=kb),
+    lambda kb: EditMessageReplyMarkup(chat_id=1, message_id=1, reply_markup=kb),
+    lambda kb: SendMessage(chat_id=1, text="t", reply_markup=kb),
+])
+def test_shared_markup_serializes_without_nulls(markup, make_method):
+    payload = _reply_markup_payload(make_method(markup))
+
+    assert payload == markup.model_dump(exclude_none=True)
+    for row in payload["inline_keyboard"]:
+        assert isinstance(row, list)
+        for button in row:
+            assert None not in button.values()
+
+
+@pytest.mark.parametrize("markup", SHARED)
+def test_shared_markup_is_immutable(markup):
+    with pytest.raises(TypeError):
+        markup.inline_keyboard.append([])
+    with pytest.raises(TypeError):
+        markup.inline_keyboard[0].append(markup.inline_keyboard[0][0])
+    with pytest.raises(Exception):
+        markup.inline_keyboard = []
+
+    assert copy.deepcopy(markup) == markup
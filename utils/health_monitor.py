@@ -192,13 +192,18 @@ class HealthMonitor:
     async def check_monitoring_lag(self, db) -> HealthMetric:
         """Проверка задержки мониторинга товаров."""
         try:
-            # Получаем товар с самым старым updated_at
+            # Самый просроченный срок проверки. updated_at для этого не
+            # годится: строка товара не переписывается, пока данные
+            # не меняются
             async with db.pool.acquire() as conn:
                 row = await conn.fetchrow(
-                    "SELECT updated_at FROM products ORDER BY updated_at ASC LIMIT 1"
+                    """SELECT MIN(COALESCE(c.next_check_at, p.created_at))
+                              AS due_at
+                       FROM products p
+                       LEFT JOIN product_checks c ON c.product_id = p.id"""
                 )
             
-            if not row:
+            if not row or row['due_at'] is None:
                 return HealthMetric(
                     name="monitoring_lag",
                     status=HealthStatus.HEALTHY,
@@ -207,8 +212,10 @@ class HealthMonitor:
                     message="Нет товаров для мониторинга"
                 )
             
-            last_update = row['updated_at']
-            lag_minutes = (datetime.now(last_update.tzinfo) - last_update).total_seconds() / 60
+            due_at = row['due_at']
+            lag_minutes = max(
+                0, (datetime.now(due_at.tzinfo) - due_at).total_seconds() / 60
+            )
             
             # Определяем статус
             status = HealthStatus.HEALTHY
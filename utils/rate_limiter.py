@@ -1,8 +1,56 @@
+import asyncio
+import time
 from aiogram import BaseMiddleware
-from typing import Callable, Dict, Any, Awaitable
+from typing import Callable, Dict, Any, Awaitable, Optional
 from datetime import datetime, timedelta
 
 
+class TokenBucket:
+    """
+    Асинхронный token bucket.
+
+    Usage:
+        bucket = TokenBucket(rate=30)
+        await bucket.acquire()  # ждёт, пока появится токен
+    """
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        """
+        Args:
+            rate: Токенов в секунду
+            capacity: Размер всплеска (по умолчанию равен rate)
+        """
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else rate
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(
+            self.capacity,
+            self._tokens + (now - self._updated) * self.rate
+        )
+        self._updated = now
+
+    @property
+    def idle(self) -> bool:
+        """Бакет полный - им давно не пользовались."""
+        self._refill()
+        return self._tokens >= self.capacity and not self._lock.locked()
+
+    async def acquire(self) -> None:
+        """Взять токен, при необходимости дождавшись его."""
+        # Лок сохраняет порядок ожидающих (FIFO)
+        async with self._lock:
+            self._refill()
+            while self._tokens < 1:
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+                self._refill()
+            self._tokens -= 1
+
+
 class RateLimitMiddleware(BaseMiddleware):
     """Middleware для защиты от флуда."""
 
@@ -39,8 +39,8 @@ def apply_wallet_discount(price: int, discount_percent: int) -> int:
     if discount_percent <= 0:
         return price
 
-    discounted = price * (1 - discount_percent / 100.0)
-    return int(discounted)  # Округление вниз
+    # Целочисленно: без float и его ошибок округления (0.07 * 100 != 7)
+    return int(price * (100 - discount_percent) // 100)  # Округление вниз
 
 
 def format_price_change(old_price: float, new_price: float) -> dict: